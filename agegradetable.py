@@ -0,0 +1,132 @@
+#!/usr/bin/python
+###########################################################################################
+# agegradetable - age grade statistics for a whole field at once
+#
+#	Date		Author		Reason
+#	----		------		------
+#       10/18/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+agegradetable - age grade statistics for a whole field at once
+=================================================================
+
+For one distance, the age grade factor and the standard time (open standard / factor) only
+depend on age and gender.  These are looked up once for every age and gender through
+loutilities.agegrade.AgeGrade, and then age grade statistics for any number of results are
+array operations.
+'''
+
+# standard
+import pdb
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+
+# table covers these ages -- AgeGrade uses the factors for age 5 below that and for age 99 above that
+MINAGE = 1
+MAXAGE = 120
+
+# AgeGrade treats X as M
+GENDERS = ['F','M','X']
+
+# time used to derive standard times from AgeGrade.agegrade()
+REFTIME = 3600.0
+
+########################################################################
+class AgeGradeTable():
+########################################################################
+    '''
+    age grade factors and standard times for one distance, for all ages and genders
+
+    :param ag: loutilities.agegrade.AgeGrade object
+    :param distance: distance (miles)
+    :param surface: (optional) 'road', 'track' or 'trail', see AgeGrade.agegrade()
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,ag,distance,surface=None):
+    #----------------------------------------------------------------------
+        import numpy as np
+
+        self.distance = distance
+        self.surface = surface
+
+        # agegrade() returns (100*stdtime/time, time*factor, factor), so stdtime can be found from any time
+        self.factors = np.zeros((len(GENDERS),MAXAGE+1),dtype=float)
+        self.stdtimes = np.zeros((len(GENDERS),MAXAGE+1),dtype=float)
+        for gendx,gen in enumerate(GENDERS):
+            for age in range(MINAGE,MAXAGE+1):
+                agpercent,agresult,factor = ag.agegrade(age,gen,distance,REFTIME,surface=surface)
+                self.factors[gendx,age] = factor
+                self.stdtimes[gendx,age] = agpercent * REFTIME / 100
+
+    #----------------------------------------------------------------------
+    def _index(self,ages,genders):
+    #----------------------------------------------------------------------
+        '''
+        return table indexes for ages and genders
+
+        :param ages: list or array of ages, fractional part is ignored
+        :param genders: list of genders 'F', 'M', 'X'
+        :rtype: (gender index array, age index array)
+        '''
+        import numpy as np
+
+        ages = np.clip(np.asarray(ages,dtype=float).astype(int),MINAGE,MAXAGE)
+        gendxs = np.array([GENDERS.index(gen.upper()) for gen in genders],dtype=int)
+        return gendxs,ages
+
+    #----------------------------------------------------------------------
+    def agegrade(self,ages,genders,times):
+    #----------------------------------------------------------------------
+        '''
+        returns age grade statistics for many results, as AgeGrade.agegrade() does for one
+
+        :param ages: list or array of ages, fractional part is ignored
+        :param genders: list of genders 'F', 'M', 'X'
+        :param times: list or array of times (seconds)
+        :rtype: (age performance percentage array, age graded result array, age grade factor array)
+        '''
+        import numpy as np
+
+        gendxs,ages = self._index(ages,genders)
+        times = np.asarray(times,dtype=float)
+        factors = self.factors[gendxs,ages]
+        agpercents = 100 * self.stdtimes[gendxs,ages] / times
+        agresults = times * factors
+        return agpercents,agresults,factors
+
+    #----------------------------------------------------------------------
+    def result(self,ages,genders,agpcs):
+    #----------------------------------------------------------------------
+        '''
+        returns times required for age grade percentages
+
+        :param ages: list or array of ages, fractional part is ignored
+        :param genders: list of genders 'F', 'M', 'X'
+        :param agpcs: list or array of age grade percentages, between 0 and 100
+        :rtype: array of times (seconds)
+        '''
+        import numpy as np
+
+        gendxs,ages = self._index(ages,genders)
+        return 100 * self.stdtimes[gendxs,ages] / np.asarray(agpcs,dtype=float)
@@ -32,8 +32,16 @@ import argparse
 import datetime
 import difflib
 import csv
+import heapq
+import collections
+import multiprocessing
+import os
+import os.path
+import hashlib
+import pickle
 
 # pypi
+import sqlalchemy
 #from IPython.core.debugger import Tracer; debughere = Tracer(); debughere() # set breakpoint where needed
 
 # github
@@ -41,6 +49,7 @@ import csv
 # home grown
 from . import version
 from . import racedb
+from .config import CONFIGDIR
 from loutilities import timeu, csvwt
 
 # exceptions for this module.  See __init__.py for package exceptions
@@ -54,6 +63,21 @@ tMS  = timeu.asctime('%M:%S')
 # SequenceMatcher to determine matching ratio, which can be used to evaluate CUTOFF value
 sm = difflib.SequenceMatcher()
 
+# size of character n-grams used to shortlist candidates for getmember
+NGRAMSIZE = 3
+
+# soundex digit for each letter, vowels and h, w, y are not coded
+SOUNDEXCODES = dict([(c,d) for letters,d in [('bfpv','1'),('cgjkqsxz','2'),('dt','3'),('l','4'),('mn','5'),('r','6')] for c in letters])
+
+# name suffixes which are ignored for phonetic keys
+NAMESUFFIXES = ['jr','sr','ii','iii','iv']
+
+# member index file format, increment if ClubMember data structures change
+INDEXVERSION = 6
+
+# ClubMember attributes which are set per invocation, so are not saved in member index file
+INDEXSKIPATTRS = ['cutoff','phoneticcutoff','missedmatches','scorer','memberdicts','dbloaded']
+
 #----------------------------------------------------------------------
 def getratio(a,b):
 #----------------------------------------------------------------------
@@ -65,6 +89,362 @@ def getratio(a,b):
     sm.set_seqs(a,b)
     return sm.ratio()
 
+#----------------------------------------------------------------------
+def datekey(ascdate):
+#----------------------------------------------------------------------
+    '''
+    return integer yyyymmdd for a date, so ages can be calculated with integer arithmetic
+    
+    age on asofdate for someone born on dob is (datekey(asofdate) - datekey(dob)) // 10000
+    
+    :param ascdate: yyyy-mm-dd date
+    :rtype: yyyymmdd integer, or None if invalid date
+    '''
+    try:
+        dt = tYmd.asc2dt(ascdate)
+    except ValueError:
+        return None
+    return dt.year*10000 + dt.month*100 + dt.day
+
+#----------------------------------------------------------------------
+def soundex(word):
+#----------------------------------------------------------------------
+    '''
+    return American Soundex code for a word, e.g., 'Katherine' and 'Kathryn' are both 'K365'
+    
+    :param word: word to encode, non-letters are ignored
+    :rtype: letter followed by three digits, or '' if word has no letters
+    '''
+    letters = [c for c in word.lower() if 'a' <= c <= 'z']
+    if not letters: return ''
+    
+    code = letters[0].upper()
+    lastdigit = SOUNDEXCODES.get(letters[0])
+    for c in letters[1:]:
+        digit = SOUNDEXCODES.get(c)
+        if digit and digit != lastdigit:
+            code += digit
+            if len(code) == 4: break
+        # letters separated by h or w are coded once, but vowels separate repeated codes
+        if c not in 'hw':
+            lastdigit = digit
+    
+    return (code + '000')[:4]
+
+#----------------------------------------------------------------------
+def phonetickey(name):
+#----------------------------------------------------------------------
+    '''
+    return phonetic key for a name, made from the soundex codes of the given and family names
+    
+    'Kathryn Mcdonald' and 'Katherine MacDonald' both have key 'K365 M235'
+    
+    :param name: name to encode
+    :rtype: phonetic key, or '' if name has no letters
+    '''
+    words = [word for word in name.lower().replace('.',' ').replace(',',' ').split() if word not in NAMESUFFIXES]
+    words = [word for word in words if soundex(word)]
+    if not words: return ''
+    return ' '.join([soundex(words[0]),soundex(words[-1])])
+
+#----------------------------------------------------------------------
+def charcounts(s):
+#----------------------------------------------------------------------
+    '''
+    return the character counts for a string, as keys for the character count index
+
+    e.g., 'otto' gives 'o', 'oo', 't', 'tt', so the number of characters two strings have in common
+    (counting repeated characters) is the number of these keys they share
+    
+    :param s: string
+    :rtype: list of character count strings
+    '''
+    return [c*count for c,n in collections.Counter(s).items() for count in range(1,n+1)]
+
+#----------------------------------------------------------------------
+def ngrams(s,n=NGRAMSIZE):
+#----------------------------------------------------------------------
+    '''
+    return the set of character n-grams for a string
+
+    string is padded with blanks so the beginning and end of the string contribute n-grams
+    
+    :param s: string to split into n-grams
+    :param n: size of n-gram
+    :rtype: set of n-gram strings
+    '''
+    padded = ' '*(n-1) + s + ' '*(n-1)
+    return set([padded[i:i+n] for i in range(len(padded)-n+1)])
+
+########################################################################
+class MemberRecord():
+########################################################################
+    '''
+    compact record for a single member
+    
+    :param name: member name
+    :param dob: yyyy-mm-dd date of birth, or '' if not known
+    :param gender: 'M' or 'F'
+    :param hometown: City, ST
+    '''
+    __slots__ = ('name','normname','dob','dobkey','gender','hometown')
+    
+    #----------------------------------------------------------------------
+    def __init__(self,name,dob,gender,hometown):
+    #----------------------------------------------------------------------
+        self.name = name.strip()
+        self.normname = self.name.lower()   # for comparisons
+        self.dob = dob
+        self.dobkey = datekey(dob)          # None if invalid date of birth
+        self.gender = gender
+        self.hometown = hometown
+    
+    #----------------------------------------------------------------------
+    def asdict(self):
+    #----------------------------------------------------------------------
+        '''
+        return member entry as dict
+        
+        :rtype: {'name':name,'dob':dateofbirth,'gender':'M'|'F','hometown':City,ST}
+        '''
+        return {'name':self.name,'dob':self.dob,'gender':self.gender,'hometown':self.hometown}
+    
+    #----------------------------------------------------------------------
+    def __repr__(self):
+    #----------------------------------------------------------------------
+        return "<MemberRecord('%s','%s','%s','%s')>" % (self.name, self.dob, self.gender, self.hometown)
+    
+########################################################################
+class SequenceMatcherScorer():
+########################################################################
+    '''
+    scores names using difflib.SequenceMatcher ratio, one pair at a time
+    
+    this is the default scorer for ClubMember
+    '''
+    
+    # ClubMember._shortlist() n-gram bound holds for SequenceMatcher ratios
+    ngrambound = True
+    
+    #----------------------------------------------------------------------
+    def charbound(self,common,wordlen,keylen):
+    #----------------------------------------------------------------------
+        '''
+        return upper bound for score of two names, from the number of characters they have in common
+        
+        this is SequenceMatcher.quick_ratio()
+        
+        :param common: number of characters in common, counting repeated characters
+        :param wordlen: length of name searched for
+        :param keylen: length of member name
+        :rtype: upper bound for score
+        '''
+        return 2.0*common/(wordlen+keylen)
+    
+    #----------------------------------------------------------------------
+    def score(self,word,keys,cutoff):
+    #----------------------------------------------------------------------
+        '''
+        score word against candidate names
+        
+        :param word: lower case name to search for
+        :param keys: list of lower case member names to score
+        :param cutoff: minimum score to return
+        :rtype: [(score,key),...] for keys which score at least cutoff
+        '''
+        s = difflib.SequenceMatcher()
+        s.set_seq2(word)
+        
+        result = []
+        for key in keys:
+            s.set_seq1(key)
+            if s.real_quick_ratio() >= cutoff and s.quick_ratio() >= cutoff and s.ratio() >= cutoff:
+                result.append((s.ratio(),key))
+        return result
+        
+########################################################################
+class NumpyScorer():
+########################################################################
+    '''
+    scores names against many candidate names at once, using numpy
+    
+    member names are encoded into character histograms and a padded code point
+    matrix once, when the scorer is set with ClubMember.setscorer(), and rows are
+    appended as members are added, so scoring only does vectorised arithmetic
+    
+    if compatible is True, scores are SequenceMatcher ratios, the same as 
+    SequenceMatcherScorer.  The candidates' quick_ratio upper bounds are calculated 
+    together from the character histograms, and the exact ratio is only calculated 
+    for candidates which get past that
+    
+    if compatible is False, scores are normalised Levenshtein similarity, 
+    1 - editdistance/max(len), calculated for all candidates together.  Cutoffs 
+    tuned for SequenceMatcher ratios may need adjustment in this case
+    
+    :param compatible: True to reproduce SequenceMatcher ratios, False for normalised Levenshtein similarity
+    '''
+    
+    #----------------------------------------------------------------------
+    def __init__(self,compatible=True):
+    #----------------------------------------------------------------------
+        import numpy as np
+        
+        self.compatible = compatible
+        
+        # ClubMember._shortlist() n-gram bound only holds for SequenceMatcher ratios
+        self.ngrambound = compatible
+        
+        # names which have been added, and their rows in the arrays
+        self.keys = []
+        self.rows = {}
+        
+        # character columns for histograms
+        self.alphabet = {}
+        
+        # arrays have room for more rows and columns than are used, so names can be appended
+        self.maxlen = 0
+        self.lengths = np.zeros(0,dtype=np.intp)
+        self.histograms = np.zeros((0,0),dtype=np.int32)
+        self.codes = np.zeros((0,0),dtype=np.int32)
+    
+    #----------------------------------------------------------------------
+    def charbound(self,common,wordlen,keylen):
+    #----------------------------------------------------------------------
+        '''
+        return upper bound for score of two names, from the number of characters they have in common
+        
+        for SequenceMatcher ratios this is quick_ratio().  For Levenshtein similarity, at least
+        max(len) - common characters have to be edited
+        
+        :param common: number of characters in common, counting repeated characters
+        :param wordlen: length of name searched for
+        :param keylen: length of member name
+        :rtype: upper bound for score
+        '''
+        if self.compatible:
+            return 2.0*common/(wordlen+keylen)
+        else:
+            return common/max(wordlen,keylen)
+    
+    #----------------------------------------------------------------------
+    def addkeys(self,keys):
+    #----------------------------------------------------------------------
+        '''
+        encode any names which haven't been added before, appending them to the arrays
+        
+        :param keys: list of lower case member names
+        '''
+        import numpy as np
+        
+        newkeys = [key for key in collections.OrderedDict.fromkeys(keys) if key not in self.rows]
+        if not newkeys: return
+        
+        firstrow = len(self.keys)
+        for key in newkeys:
+            self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            for c in key:
+                if c not in self.alphabet:
+                    self.alphabet[c] = len(self.alphabet)
+        self.maxlen = max([self.maxlen]+[len(key) for key in newkeys])
+        
+        # grow the arrays, at least doubling, so appending one name at a time doesn't copy the arrays each time
+        numrows,numcols,width = len(self.keys),len(self.alphabet),self.maxlen
+        if numrows > len(self.lengths) or numcols > self.histograms.shape[1] or width > self.codes.shape[1]:
+            numrows = max(numrows,2*len(self.lengths)) if numrows > len(self.lengths) else len(self.lengths)
+            numcols = max(numcols,self.histograms.shape[1])
+            width = max(width,self.codes.shape[1])
+            lengths = np.zeros(numrows,dtype=np.intp)
+            lengths[:firstrow] = self.lengths[:firstrow]
+            histograms = np.zeros((numrows,numcols),dtype=np.int32)
+            histograms[:firstrow,:self.histograms.shape[1]] = self.histograms[:firstrow]
+            codes = np.zeros((numrows,width),dtype=np.int32)
+            codes[:firstrow,:self.codes.shape[1]] = self.codes[:firstrow]
+            self.lengths,self.histograms,self.codes = lengths,histograms,codes
+        
+        # padding is never compared because distance is taken from each name's length
+        newlengths = np.array([len(key) for key in newkeys],dtype=np.intp)
+        self.lengths[firstrow:firstrow+len(newkeys)] = newlengths
+        rowindex = np.repeat(np.arange(firstrow,firstrow+len(newkeys)),newlengths)
+        colindex = np.array([self.alphabet[c] for key in newkeys for c in key],dtype=np.intp)
+        np.add.at(self.histograms,(rowindex,colindex),1)
+        posindex = np.array([i for key in newkeys for i in range(len(key))],dtype=np.intp)
+        self.codes[rowindex,posindex] = np.array([ord(c) for key in newkeys for c in key],dtype=np.int32)
+    
+    #----------------------------------------------------------------------
+    def score(self,word,keys,cutoff):
+    #----------------------------------------------------------------------
+        '''
+        score word against candidate names
+        
+        :param word: lower case name to search for
+        :param keys: list of lower case member names to score
+        :param cutoff: minimum score to return
+        :rtype: [(score,key),...] for keys which score at least cutoff
+        '''
+        import numpy as np
+        
+        if not keys: return []
+        
+        # names are normally added by ClubMember, but any others are added here
+        self.addkeys(keys)
+        rows = np.fromiter((self.rows[key] for key in keys),dtype=np.intp,count=len(keys))
+        
+        if self.compatible:
+            # quick_ratio is 2*(number of characters in common)/(total length), an upper bound for ratio
+            wordhist = np.zeros(self.histograms.shape[1],dtype=np.int32)
+            for c in word:
+                if c in self.alphabet:
+                    wordhist[self.alphabet[c]] += 1
+            common = np.minimum(self.histograms[rows],wordhist).sum(axis=1)
+            totallen = self.lengths[rows] + len(word)
+            quick = 2.0*common/np.maximum(totallen,1)
+            
+            s = difflib.SequenceMatcher()
+            s.set_seq2(word)
+            result = []
+            for i in np.flatnonzero(quick >= cutoff):
+                s.set_seq1(keys[i])
+                ratio = s.ratio()
+                if ratio >= cutoff:
+                    result.append((ratio,keys[i]))
+            return result
+        
+        else:
+            scores = self._levenshtein(word,rows)
+            return [(float(scores[i]),keys[i]) for i in np.flatnonzero(scores >= cutoff)]
+    
+    #----------------------------------------------------------------------
+    def _levenshtein(self,word,rows):
+    #----------------------------------------------------------------------
+        '''
+        return normalised Levenshtein similarity between word and names in rows
+        
+        the edit distance table is filled in one row per character of word, for all
+        names together.  Insertions within a row are resolved with a running minimum
+        
+        :param word: lower case name to search for
+        :param rows: array of rows for names to be scored
+        :rtype: array of similarity for each row, in range [0,1]
+        '''
+        import numpy as np
+        
+        codes = self.codes[rows,:self.maxlen]
+        lengths = self.lengths[rows]
+        offsets = np.arange(codes.shape[1]+1)
+        
+        # distances from empty prefix of word
+        dist = np.tile(offsets,(len(rows),1))
+        for i,c in enumerate(word,1):
+            cost = (codes != ord(c))
+            substitute = np.empty_like(dist)
+            substitute[:,0] = i
+            substitute[:,1:] = np.minimum(dist[:,:-1] + cost, dist[:,1:] + 1)
+            dist = np.minimum.accumulate(substitute - offsets,axis=1) + offsets
+        
+        distance = dist[np.arange(len(rows)),lengths]
+        return 1.0 - distance/np.maximum(np.maximum(lengths,len(word)),1)
+        
 ########################################################################
 class ClubMember():
 ########################################################################
@@ -75,20 +455,56 @@ class ClubMember():
     
     :params csvfile: csv file from which club members are to be retrieved
     :params cutoff: cutoff for getmember.  float in (0,1].  higher means strings have to match more closely to be considered "close".  Default 0.6
+    :params phoneticcutoff: if set, cutoff for getmember for names which sound the same as the name searched for, usually lower than cutoff.
+        This only adds close matches, it doesn't narrow the names which are scored
+    :params indexfile: if set, member index file to load members from if valid for signature, else written after csvfile is read
+    :params signature: identifies the member information the index file was created from, e.g., from filesignature()
     '''
     #----------------------------------------------------------------------
-    def __init__(self,csvfile,cutoff=0.6,exceldates=True):
+    def __init__(self,csvfile,cutoff=0.6,exceldates=True,indexfile=None,signature=None,phoneticcutoff=None):
     #----------------------------------------------------------------------
-        _IN = open(csvfile,'r',newline='')
-        IN = csv.DictReader(_IN)
-        
-        # collect member information by member name
+        # collect member information by member name, {lowername:[MemberRecord,...],...}
         self.members = {}
         self.exceldates = exceldates
         
+        # member dicts by member name, as returned by getmembers(), getmember() and getcandidates()
+        # {lowername:[dict,...],...}, built when requested, and dropped for a name when its members change
+        self.memberdicts = {}
+        
+        # inverted index of character n-grams, {ngram:set(lowername,...),...}, used to shortlist getmember candidates
+        self.ngramindex = {}
+        
+        # inverted index of character counts, {char*count:set(lowername,...),...}, e.g., 'tt' has names with at least two t's
+        # used to shortlist getmember candidates when the n-gram index can't rule names out
+        self.charindex = {}
+        
+        # phonetic blocking index, {phonetickey:set(lowername,...),...}, only kept if phoneticcutoff is set
+        self.phoneticindex = {} if phoneticcutoff is not None else None
+        
+        # member names by year of birth, {year:set(lowername,...),...}, and names of members with invalid date of birth
+        # these are used to restrict findmember() to candidates within an age window
+        self.birthyears = {}
+        self.nobirthyear = set()
+        
+        # confirmed aliases, {aliaslowername:[lowername,...],...}, used rather than searching for close matches
+        self.aliases = {}
+        
         # set getmember cutoff.  This is a float within (0,1]
         # higher means strings have to match more closely to be considered "close"
         self.cutoff = cutoff
+        self.phoneticcutoff = phoneticcutoff
+        
+        # scores close matches, see setscorer()
+        self.scorer = SequenceMatcherScorer()
+        
+        # subclass may collect members some other way
+        if csvfile is None: return
+        
+        # use the index file if it was created from the same member information
+        if indexfile and self.loadindex(indexfile,signature): return
+        
+        _IN = open(csvfile,'r',newline='')
+        IN = csv.DictReader(_IN)
         
         # read each row in input file, and create the member data structure
         for thisrow in IN:
@@ -99,21 +515,382 @@ class ClubMember():
             last = last.strip()
             
             name = ' '.join([first,last])
-            thismember = {}
-            thismember['name'] = name.strip()
-            if thismember['name'] == '': break   # assume first blank 'name' is the end of the data
+            if name.strip() == '': break   # assume first blank 'name' is the end of the data
 
             dob = self.file2ascdate(thisrow['DOB'])
-            thismember['dob'] = dob
-            thismember['gender'] = thisrow['Gender'].upper().strip()
-            thismember['hometown'] = ', '.join([thisrow['City'].strip(),thisrow['State'].strip()])
+            gender = thisrow['Gender'].upper().strip()
+            hometown = ', '.join([thisrow['City'].strip(),thisrow['State'].strip()])
+            self.addmember(name,dob,gender,hometown)
+        
+        _IN.close()
+        
+        if indexfile:
+            self.saveindex(indexfile,signature)
+    
+    #----------------------------------------------------------------------
+    def loadindex(self,indexfile,signature):
+    #----------------------------------------------------------------------
+        '''
+        load member data structures from member index file
+        
+        the index file is only used if it was saved by this version of the software
+        with the same signature, otherwise it is ignored
+        
+        :param indexfile: member index file name
+        :param signature: signature the index file must have been saved with
+        :rtype: True if members were loaded from indexfile
+        '''
+        index = readindexfile(indexfile)
+        if not index or index['version'] != INDEXVERSION or index['signature'] != signature:
+            return False
+        
+        self.__dict__.update(index['state'])
+        self.memberdicts = {}
+        
+        # phonetic index is only kept if it's used
+        if self.phoneticcutoff is None:
+            self.phoneticindex = None
+        return True
+    
+    #----------------------------------------------------------------------
+    def saveindex(self,indexfile,signature):
+    #----------------------------------------------------------------------
+        '''
+        save member data structures to member index file
+        
+        failure to save the index file is not an error, the members will just be
+        collected from scratch next time
+        
+        :param indexfile: member index file name
+        :param signature: identifies the member information the members were collected from
+        '''
+        state = dict([(attr,val) for attr,val in self.__dict__.items() if attr not in INDEXSKIPATTRS])
+        writeindexfile(indexfile,{'version':INDEXVERSION,'signature':signature,'state':state})
+    
+    #----------------------------------------------------------------------
+    def addmember(self,name,dob,gender,hometown):
+    #----------------------------------------------------------------------
+        '''
+        add a member to the member data structure, and all the indexes
+        
+        :param name: member name
+        :param dob: yyyy-mm-dd date of birth, or '' if not known
+        :param gender: 'M' or 'F'
+        :param hometown: City, ST
+        '''
+        # date of birth is parsed once, here
+        thismember = MemberRecord(name,dob,gender,hometown)
+        
+        # make self.memberskeys lower case
+        # lower case comparisons are always done, to avoid UPPER NAME issue, and any other case related issues
+        lowername = name.lower()
+        if lowername not in self.members:
+            self.members[lowername] = []
+            self._indexname(lowername)
+            if hasattr(self.scorer,'addkeys'):
+                self.scorer.addkeys([lowername])
+        self.members[lowername].append(thismember)    # allows for possibility that multiple members have same name
+        self.memberdicts.pop(lowername,None)
+        
+        if thismember.dobkey is None:
+            self.nobirthyear.add(lowername)
+        else:
+            self.birthyears.setdefault(thismember.dobkey // 10000, set()).add(lowername)
+    
+    #----------------------------------------------------------------------
+    def removemember(self,name,dob):
+    #----------------------------------------------------------------------
+        '''
+        remove a member from the member data structure, and all the indexes
+        
+        :param name: member name
+        :param dob: yyyy-mm-dd date of birth, or '' if not known
+        :rtype: True if member was removed, False if member was not found
+        '''
+        lowername = name.lower()
+        thesemembers = self.members.get(lowername,[])
+        for thismember in thesemembers:
+            if thismember.name == name.strip() and thismember.dob == dob:
+                break
+        else:
+            return False
+        
+        thesemembers.remove(thismember)
+        self.memberdicts.pop(lowername,None)
+        
+        # last member with this name, remove name from the indexes
+        if not thesemembers:
+            del self.members[lowername]
+            self._unindexname(lowername)
+            for aliasname in list(self.aliases.keys()):
+                if lowername in self.aliases[aliasname]:
+                    self.aliases[aliasname].remove(lowername)
+                    if not self.aliases[aliasname]:
+                        del self.aliases[aliasname]
+        
+        # birth year index may still need the name for another member with the same name
+        birthyears = set([member.dobkey // 10000 for member in thesemembers if member.dobkey is not None])
+        if thismember.dobkey is None:
+            if not [member for member in thesemembers if member.dobkey is None]:
+                self.nobirthyear.discard(lowername)
+        else:
+            year = thismember.dobkey // 10000
+            if year not in birthyears:
+                self.birthyears[year].discard(lowername)
+                if not self.birthyears[year]:
+                    del self.birthyears[year]
+        
+        return True
+    
+    #----------------------------------------------------------------------
+    def updatemember(self,name,dob,newname=None,newdob=None,gender=None,hometown=None):
+    #----------------------------------------------------------------------
+        '''
+        update a member in the member data structure, and all the indexes
+        
+        any of newname, newdob, gender, hometown which are None are left unchanged
+        
+        :param name: member name
+        :param dob: yyyy-mm-dd date of birth, or '' if not known
+        :param newname: new member name
+        :param newdob: new yyyy-mm-dd date of birth
+        :param gender: new gender 'M' or 'F'
+        :param hometown: new hometown City, ST
+        :rtype: True if member was updated, False if member was not found
+        '''
+        for thismember in self.members.get(name.lower(),[]):
+            if thismember.name == name.strip() and thismember.dob == dob:
+                break
+        else:
+            return False
+        
+        self.removemember(name,dob)
+        self.addmember(newname if newname is not None else thismember.name,
+                       newdob if newdob is not None else thismember.dob,
+                       gender if gender is not None else thismember.gender,
+                       hometown if hometown is not None else thismember.hometown)
+        return True
+    
+    #----------------------------------------------------------------------
+    def addalias(self,alias,name):
+    #----------------------------------------------------------------------
+        '''
+        add a confirmed alias for a member name
+        
+        once a name has an alias, getmember() and findmember() return the aliased member(s) 
+        for that name without searching for close matches.  A member with exactly that name is
+        still returned first
+        
+        :param alias: name which is known to refer to member, e.g., as found in race results
+        :param name: member name
+        :rtype: True if alias was added, False if name is not a member
+        '''
+        lowername = name.lower()
+        if lowername not in self.members: return False
+        
+        aliasnames = self.aliases.setdefault(alias.lower(),[])
+        if lowername not in aliasnames:
+            aliasnames.append(lowername)
+        return True
+    
+    #----------------------------------------------------------------------
+    def isalias(self,name):
+    #----------------------------------------------------------------------
+        '''
+        return True if name is a confirmed alias
+        
+        :param name: name to check
+        :rtype: boolean
+        '''
+        return name.lower() in self.aliases
+    
+    #----------------------------------------------------------------------
+    def _indexname(self,lowername):
+    #----------------------------------------------------------------------
+        '''
+        add a member name to the n-gram and character count indexes
+        
+        :param lowername: lower case member name, as used for self.members key
+        '''
+        for gram in ngrams(lowername):
+            if gram not in self.ngramindex:
+                self.ngramindex[gram] = set()
+            self.ngramindex[gram].add(lowername)
+        
+        for charcount in charcounts(lowername):
+            self.charindex.setdefault(charcount,set()).add(lowername)
+        
+        if self.phoneticindex is not None:
+            key = phonetickey(lowername)
+            if key:
+                self.phoneticindex.setdefault(key,set()).add(lowername)
+    
+    #----------------------------------------------------------------------
+    def _unindexname(self,lowername):
+    #----------------------------------------------------------------------
+        '''
+        remove a member name from the n-gram and character count indexes
+        
+        :param lowername: lower case member name, as used for self.members key
+        '''
+        for gram in ngrams(lowername):
+            self.ngramindex[gram].discard(lowername)
+            if not self.ngramindex[gram]:
+                del self.ngramindex[gram]
+        
+        for charcount in charcounts(lowername):
+            self.charindex[charcount].discard(lowername)
+            if not self.charindex[charcount]:
+                del self.charindex[charcount]
+        
+        if self.phoneticindex is not None:
+            key = phonetickey(lowername)
+            if key:
+                self.phoneticindex[key].discard(lowername)
+                if not self.phoneticindex[key]:
+                    del self.phoneticindex[key]
+    
+    #----------------------------------------------------------------------
+    def getphoneticblock(self,name):
+    #----------------------------------------------------------------------
+        '''
+        return member names which sound the same as name, i.e., have the same phonetic key
+        
+        this is only a recall aid -- getmember() still scores the name against the shortlist,
+        and the phonetic block adds names which are allowed to match with the lower phoneticcutoff.
+        It doesn't reduce the number of names which are scored
+        
+        the phonetic index is built the first time it is needed, if it wasn't kept as members were added
+        
+        :param name: name to look up
+        :rtype: set of lower case member names
+        '''
+        if self.phoneticindex is None:
+            self.phoneticindex = {}
+            for lowername in self.members:
+                key = phonetickey(lowername)
+                if key:
+                    self.phoneticindex.setdefault(key,set()).add(lowername)
+        
+        key = phonetickey(name)
+        if not key: return set()
+        return self.phoneticindex.get(key,set())
+    
+    #----------------------------------------------------------------------
+    def _shortlist(self,lowername):
+    #----------------------------------------------------------------------
+        '''
+        return member names which could be close matches to lowername, to be scored
+        
+        the matching blocks which SequenceMatcher finds between two names are separated by
+        unmatched characters, so for names with total length L which satisfy self.cutoff c, there are 
+        at most D = L*(1-c) unmatched characters, at most D+1 blocks, and at least L*c/2 matched 
+        characters.  Every n-gram within a block is shared by both names, so the names share at least 
+        L*c/2 - (NGRAMSIZE-1)*(D+1) n-gram positions, less any n-grams repeated within lowername.
+        Names sharing fewer n-grams than that cannot be close matches.  This bound is only used if
+        the scorer's ngrambound is set, and if it rules out names which share no n-grams at all
+        (cutoff above about 0.8)
+        
+        otherwise the number of characters each name has in common with lowername is counted from
+        the character count index, and names whose scorer charbound() is below the cutoff are left out,
+        e.g., quick_ratio() for SequenceMatcher.  Either way the result is never different from scoring 
+        every name.  If the scorer has no charbound(), all member names are returned
+        
+        :param lowername: lower case name to search for
+        :rtype: list of lower case member names
+        '''
+        c = self.cutoff
+        la = len(lowername)
+        charbound = getattr(self.scorer,'charbound',None)
+        if la == 0 or c <= 0 or charbound is None:
+            return list(self.members)
+        
+        if getattr(self.scorer,'ngrambound',False):
+            namegrams = ngrams(lowername)
+            
+            # n-grams repeated within lowername are only counted once
+            repeated = la + NGRAMSIZE - 1 - len(namegrams)
+            def mincommon(lb):
+                total = la + lb
+                return total*c/2 - (NGRAMSIZE-1)*(total*(1-c)+1) - repeated - 1e-9     # allow for float rounding
             
-            # make self.memberskeys lower case
-            # lower case comparisons are always done, to avoid UPPER NAME issue, and any other case related issues
-            lowername = name.lower()
-            if lowername not in self.members:
-                self.members[lowername] = []
-            self.members[lowername].append(thismember)    # allows for possibility that multiple members have same name
+            # mincommon is linear in lb, so it is positive over the range of lengths which satisfy 
+            # real_quick_ratio() >= c if it is positive at both ends of that range
+            shortest = la*c/(2-c)
+            longest = la*(2-c)/c
+            if mincommon(shortest) > 0 and mincommon(longest) > 0:
+                # count the number of n-grams each member name shares with lowername
+                common = collections.Counter()
+                for gram in namegrams:
+                    if gram in self.ngramindex:
+                        common.update(self.ngramindex[gram])
+                return [key for key,count in common.items() if count >= mincommon(len(key))]
+        
+        # count the number of characters each member name has in common with lowername
+        common = collections.Counter()
+        for charcount in charcounts(lowername):
+            if charcount in self.charindex:
+                common.update(self.charindex[charcount])
+        return [key for key,count in common.items() if charbound(count,la,len(key)) >= c - 1e-9]      # allow for float rounding
+    
+    #----------------------------------------------------------------------
+    def _scoredmatches(self,name,n=3,birthyears=None):
+    #----------------------------------------------------------------------
+        '''
+        return list of member names which are close matches to name, with their scores, best match first
+        
+        with the default scorer, the names are the same as difflib.get_close_matches(name.lower(),list(self.members.keys()),n=n,cutoff=self.cutoff),
+        except only the candidates shortlisted by the n-gram index are scored
+        
+        :param name: name to search for
+        :param n: maximum number of close matches to return
+        :param birthyears: if set, (firstyear,lastyear) -- only members born in these years, or with invalid date of birth, are considered
+        :rtype: [(score,lowername),...] -- confirmed aliases have score 1.0
+        '''
+        word = name.lower()
+        if birthyears is not None:
+            candidates = self._birthyearmembers(*birthyears)
+        
+        # confirmed aliases don't need to be searched for, but a member with exactly this name comes first
+        # if none of these are in the age window, close matches are searched for as usual
+        if word in self.aliases:
+            keys = ([word] if word in self.members else []) + [key for key in self.aliases[word] if key != word]
+            if birthyears is not None:
+                keys = [key for key in keys if key in candidates]
+            if keys:
+                return [(1.0,key) for key in keys[:n]]
+        
+        shortlist = self._shortlist(word)
+        if birthyears is not None:
+            shortlist = [key for key in shortlist if key in candidates]
+        
+        result = self.scorer.score(word,shortlist,self.cutoff)
+        
+        # names which sound the same are allowed to be further apart
+        if self.phoneticcutoff is not None and self.phoneticcutoff < self.cutoff:
+            block = self.getphoneticblock(word)
+            if birthyears is not None:
+                block = block & candidates
+            found = set([key for score,key in result])
+            result += self.scorer.score(word,[key for key in block if key not in found],self.phoneticcutoff)
+        
+        # best matches first
+        return heapq.nlargest(n,result)
+    
+    #----------------------------------------------------------------------
+    def setscorer(self,scorer):
+    #----------------------------------------------------------------------
+        '''
+        set the scorer used to find close matches
+        
+        if the scorer has addkeys(), e.g., NumpyScorer, it is given all the member names now, and
+        names of members added later
+        
+        :param scorer: SequenceMatcherScorer (default), NumpyScorer, or object with same score() method
+        '''
+        self.scorer = scorer
+        if hasattr(scorer,'addkeys'):
+            scorer.addkeys(list(self.members))
     
     #----------------------------------------------------------------------
     def file2ascdate(self,date):
@@ -146,8 +923,40 @@ class ClubMember():
         :rtype: {name.lower():[{'name':name,'dob':dateofbirth,'gender':'M'|'F','hometown':City,ST},...],...}
         '''
         
-        return self.members
+        # memberdicts only has names which are in self.members, so it is complete if it is the same size
+        if len(self.memberdicts) < len(self.members):
+            for lowername in self.members:
+                self._memberdicts(lowername)
+        return self.memberdicts
+    
+    #----------------------------------------------------------------------
+    def _memberdicts(self,lowername):
+    #----------------------------------------------------------------------
+        '''
+        returns member dicts for a member name, building them the first time they are requested
+        
+        :param lowername: lower case member name, as used for self.members key
+        :rtype: [{'name':name,'dob':dateofbirth,'gender':'M'|'F','hometown':City,ST},...]
+        '''
+        if lowername not in self.memberdicts:
+            self.memberdicts[lowername] = [member.asdict() for member in self.members[lowername]]
+        return self.memberdicts[lowername]
     
+    #----------------------------------------------------------------------
+    def getcandidates(self,name,k=3):
+    #----------------------------------------------------------------------
+        '''
+        returns member records for the k member names which best match name, with their scores
+        
+        the roster is only searched once.  All the members with the same name get the same score,
+        so more than k records may be returned
+        
+        :param name: name to search for
+        :param k: maximum number of distinct member names to return records for
+        :rtype: [(score,{'name':name,'dob':dateofbirth,'gender':'M'|'F','hometown':City,ST}),...], best match first
+        '''
+        return [(score,memberdict) for score,key in self._scoredmatches(name,k) for memberdict in self._memberdicts(key)]
+        
     #----------------------------------------------------------------------
     def getmember(self,name):
     #----------------------------------------------------------------------
@@ -162,19 +971,19 @@ class ClubMember():
         :rtype: {'matchingmembers':member record list, 'exactmatch':boolean, 'closematches':member name list}
         '''
         
-        closematches = difflib.get_close_matches(name.lower(),list(self.members.keys()),cutoff=self.cutoff)
+        closematches = [key for score,key in self._scoredmatches(name)]
         
         rval = {}
         if len(closematches) > 0:
             topmatch = closematches.pop(0)
             rval['exactmatch'] = (name.lower() == topmatch.lower()) # ignore case
-            rval['matchingmembers'] = self.members[topmatch][:] # make a copy
+            rval['matchingmembers'] = self._memberdicts(topmatch)[:]
             rval['closematches'] = closematches[:]
             
         return rval
         
     #----------------------------------------------------------------------
-    def findmember(self,name,age,asofdate):
+    def findmember(self,name,age,asofdate,agewindow=None):
     #----------------------------------------------------------------------
         '''
         returns (name,dateofbirth) for a specific member, after checking age
@@ -182,51 +991,135 @@ class ClubMember():
         if name wasn't found, None is returned (self.getmissedmatches() returns a list of missed matches)
         if no dob in members file, None is returned for dateofbirth
         
+        if agewindow is set, only members whose age is within agewindow years of age (and members with
+        invalid dates of birth) are considered.  In this case missed matches only include members within
+        the age window.  Call again with agewindow=None if the missed matches for all ages are needed
+        
         :param name: name to search for
         :param age: age to match for
         :param asofdate: 'yyyy-mm-dd' date for which age is to be matched
+        :param agewindow: if set, number of years difference from age for members to be considered
         :rtype: (name,dateofbirth) or None if not found.  dateofbirth is ascii yyyy-mm-dd
         '''
         
         # self.missedmatches keeps list of possible matches.  Can be retrieved via self.getmissedmatches()
-        self.missedmatches = []
-        matches = self.getmember(name)
+        found,self.missedmatches = self._findmember(name,age,asofdate,self._scoredmatches,agewindow)
+        return found
         
-        if not matches: return None
+    #----------------------------------------------------------------------
+    def _birthyearmembers(self,firstyear,lastyear):
+    #----------------------------------------------------------------------
+        '''
+        return names of members born within a range of years, or with invalid date of birth
         
-        foundmember = False
-        memberage = None
-        checkmembers = iter([matches['matchingmembers'][0]['name']] + matches['closematches'])
-        while not foundmember:
-            try:
-                checkmember = next(checkmembers)
-            except StopIteration:
-                break
-            matches = self.getmember(checkmember)
-            for member in matches['matchingmembers']:
-                # assume match for first member of correct age -- TODO: need to do better age checking [what the heck did I mean here?]
-                asofdate_dt = tYmd.asc2dt(asofdate)
-                try:
-                    memberdob = tYmd.asc2dt(member['dob'])
-                    # note below that True==1 and False==0
-                    memberage = asofdate_dt.year - memberdob.year - int((asofdate_dt.month, asofdate_dt.day) < (memberdob.month, memberdob.day))
-                    if memberage == age:
-                        foundmember = True
-                        membername = member['name']
-                    else:
-                        self.missedmatches.append({'name':name,'asofdate':asofdate,'age':age,
-                                                   'dbname':member['name'],'dob':member['dob'],
-                                                   'ratio':getratio(name.strip().lower(),member['name'].strip().lower())})
+        :param firstyear: first year of birth
+        :param lastyear: last year of birth
+        :rtype: set of lower case member names
+        '''
+        candidates = set(self.nobirthyear)
+        for year in range(firstyear,lastyear+1):
+            candidates.update(self.birthyears.get(year,[]))
+        return candidates
+        
+    #----------------------------------------------------------------------
+    def _findmember(self,name,age,asofdate,scoredmatches,agewindow=None):
+    #----------------------------------------------------------------------
+        '''
+        returns ((name,dateofbirth),missedmatches) for a specific member, after checking age
+        
+        see findmember() for parameters
+        
+        :param scoredmatches: function used to look up names, e.g., self._scoredmatches
+        :rtype: ((name,dateofbirth) or None, [missedmatch,...])
+        '''
+        
+        missedmatches = []
+        
+        # age window only makes sense if we have an age
+        # someone age years old on asofdate was born in one of two years
+        if agewindow is not None and isinstance(age,int):
+            lastyear = tYmd.asc2dt(asofdate).year - age + agewindow
+            checkmembers = scoredmatches(name,birthyears=(lastyear-2*agewindow-1,lastyear))
+        else:
+            agewindow = None
+            checkmembers = scoredmatches(name)
+        
+        if not checkmembers: return None,missedmatches
+        
+        asofkey = datekey(asofdate)
+        if asofkey is None:
+            raise ValueError('invalid asofdate {}'.format(asofdate))
+        normname = name.strip().lower()
+        
+        # assume match for first member of correct age -- TODO: need to do better age checking [what the heck did I mean here?]
+        for score,checkmember in checkmembers:
+            for member in self.members[checkmember]:
                 # invalid dob in member database
-                except ValueError:
-                    foundmember = True
-                    membername = member['name']
-                if foundmember: break
+                if member.dobkey is None:
+                    return (member.name,member.dob),missedmatches
+                
+                memberage = (asofkey - member.dobkey) // 10000
+                if memberage == age:
+                    return (member.name,member.dob),missedmatches
+                
+                # with age window, members with same name could still be outside the window
+                if agewindow is None or abs(memberage - age) <= agewindow:
+                    missedmatches.append({'name':name,'asofdate':asofdate,'age':age,
+                                          'dbname':member.name,'dob':member.dob,
+                                          'ratio':getratio(normname,member.normname)})
                 
-        if foundmember:
-            return membername,member['dob']
+        return None,missedmatches
+        
+    #----------------------------------------------------------------------
+    def findmembers(self,queries,processes=None,agewindow=None):
+    #----------------------------------------------------------------------
+        '''
+        find many members at once, e.g., all the entries in a results file
+        
+        repeated queries are only searched once, and name lookups are shared across all of the queries
+        
+        :param queries: list of (name,age,asofdate) tuples, as would be passed to findmember()
+        :param processes: if set, number of worker processes to spread the search over
+        :param agewindow: if set, number of years difference from age for members to be considered -- see findmember()
+        :rtype: [((name,dateofbirth) or None, [missedmatch,...]),...] in same order as queries -- see findmember(), getmissedmatches()
+        '''
+        
+        # only search for each distinct query once
+        uniquequeries = list(collections.OrderedDict.fromkeys(queries))
+        
+        if processes and len(uniquequeries) > 1:
+            # each worker gets a copy of this object when it is started, then takes a share of the queries
+            chunksize = (len(uniquequeries) + processes - 1) // processes
+            chunks = [uniquequeries[i:i+chunksize] for i in range(0,len(uniquequeries),chunksize)]
+            with multiprocessing.Pool(processes,initializer=_initworker,initargs=(self,)) as pool:
+                chunkresults = pool.starmap(_workerfindmembers,[(chunk,agewindow) for chunk in chunks])
+            uniqueresults = [result for chunkresult in chunkresults for result in chunkresult]
         else:
-            return None
+            uniqueresults = self._findmembers(uniquequeries,agewindow)
+        
+        found = dict(list(zip(uniquequeries,uniqueresults)))
+        return [found[query] for query in queries]
+    
+    #----------------------------------------------------------------------
+    def _findmembers(self,queries,agewindow=None):
+    #----------------------------------------------------------------------
+        '''
+        find members for list of queries, remembering name lookups across queries
+        
+        :param queries: list of (name,age,asofdate) tuples
+        :param agewindow: if set, number of years difference from age for members to be considered
+        :rtype: list of (found,missedmatches) in same order as queries
+        '''
+        
+        # _scoredmatches() results depend only on lower case name and the range of birth years
+        lookups = {}
+        def scoredmatches(name,birthyears=None):
+            lookup = (name.lower(),birthyears)
+            if lookup not in lookups:
+                lookups[lookup] = self._scoredmatches(name,birthyears=birthyears)
+            return lookups[lookup]
+        
+        return [self._findmember(name,age,asofdate,scoredmatches,agewindow) for name,age,asofdate in queries]
         
     #----------------------------------------------------------------------
     def findname(self,name):
@@ -241,28 +1134,35 @@ class ClubMember():
         :rtype: name or None if not found
         '''
         
-        matches = self.getmember(name)
+        # exact match is always the best match, so no need to search, even if name is also an alias
+        lowername = name.lower()
+        if lowername in self.members:
+            return self.members[lowername][0].name
         
+        # assume match for first member found
+        matches = self._scoredmatches(name,1)
         if not matches: return None
+        score,key = matches[0]
+        return self.members[key][0].name
         
-        # TODO: this is probably overly complicated due to cut/paste from findmember.  Cleanup would provide first 'matchingmember'
-        foundname = False
-        checkmembers = iter([matches['matchingmembers'][0]['name']] + matches['closematches'])
-        while not foundname:
-            try:
-                checkmember = next(checkmembers)
-            except StopIteration:
-                break
-            matches = self.getmember(checkmember)
-            if len(matches['matchingmembers']) > 0:
-                # assume match for first member found
-                foundname = True
-                membername = matches['matchingmembers'][0]['name']
-                
-        if foundname:
-            return membername
-        else:
-            return None
+    #----------------------------------------------------------------------
+    def findnames(self,names):
+    #----------------------------------------------------------------------
+        '''
+        returns names found within the list, for many names at once
+        
+        repeated names are only searched once
+        
+        :param names: list of names to search for
+        :rtype: list of name or None, in same order as names -- see findname()
+        '''
+        
+        found = {}
+        for name in names:
+            if name not in found:
+                found[name] = self.findname(name)
+        
+        return [found[name] for name in names]
         
     #----------------------------------------------------------------------
     def getmissedmatches(self):
@@ -275,6 +1175,164 @@ class ClubMember():
         
         return self.missedmatches
     
+#----------------------------------------------------------------------
+def readindexfile(indexfile):
+#----------------------------------------------------------------------
+    '''
+    read member index file
+    
+    :param indexfile: member index file name
+    :rtype: index contents, or None if file is missing or unreadable
+    '''
+    try:
+        with open(indexfile,'rb') as IDX:
+            return pickle.loads(IDX.read())
+    # missing, empty or corrupt file -- index will be rebuilt
+    except Exception:
+        return None
+
+#----------------------------------------------------------------------
+def writeindexfile(indexfile,index):
+#----------------------------------------------------------------------
+    '''
+    write member index file
+    
+    the file is replaced in one step so a concurrent reader never sees a partial index
+    
+    :param indexfile: member index file name
+    :param index: index contents
+    :rtype: True if written
+    '''
+    tempfile = '{}.{}.tmp'.format(indexfile,os.getpid())
+    try:
+        with open(tempfile,'wb') as IDX:
+            pickle.dump(index,IDX,pickle.HIGHEST_PROTOCOL)
+        os.replace(tempfile,indexfile)
+        return True
+    # e.g., no write access to directory
+    except (OSError,pickle.PicklingError):
+        if os.path.exists(tempfile):
+            os.remove(tempfile)
+        return False
+
+#----------------------------------------------------------------------
+def getindexfile(memberfile):
+#----------------------------------------------------------------------
+    '''
+    return name of member index file which goes with a member file
+    
+    :param memberfile: csv, xls or xlsx member file name
+    :rtype: member index file name
+    '''
+    return '{}.memberindex'.format(os.path.splitext(memberfile)[0])
+
+#----------------------------------------------------------------------
+def getdbindexfile(session,kind):
+#----------------------------------------------------------------------
+    '''
+    return name of member index file for the database a session is bound to
+    
+    :param session: database session
+    :param kind: distinguishes the different indexes which are kept for a database
+    :rtype: member index file name, in configuration directory
+    '''
+    # leave password out of database identification
+    url = session.get_bind().url
+    dbident = '{}://{}/{}:{}'.format(url.drivername,url.host or '',url.database,kind)
+    return os.path.join(CONFIGDIR,'{}.memberindex'.format(hashlib.sha1(dbident.encode('utf-8')).hexdigest()))
+
+#----------------------------------------------------------------------
+def filesignature(filename,*options):
+#----------------------------------------------------------------------
+    '''
+    return signature of a member file, to check whether member index file is current
+    
+    the file contents are hashed, so the signature doesn't change if the file is just copied or touched
+    
+    :param filename: member file name
+    :param options: any options which affect how the file is interpreted
+    :rtype: signature
+    '''
+    filehash = hashlib.sha1()
+    with open(filename,'rb') as MEM:
+        for block in iter(lambda: MEM.read(1<<16), b''):
+            filehash.update(block)
+    return (filehash.hexdigest(),) + options
+
+#----------------------------------------------------------------------
+def dbsignature(session):
+#----------------------------------------------------------------------
+    '''
+    return signature of runner and alias tables, to check whether member index file is current
+    
+    runner count is included in case the database was updated by software which doesn't count changes
+    
+    :param session: database session
+    :rtype: signature
+    '''
+    return (racedb.getchangecount(session,racedb.Runner.__tablename__) + racedb.getchangecount(session,racedb.Alias.__tablename__)
+            + (session.query(sqlalchemy.func.count(racedb.Runner.id)).scalar(),))
+
+#----------------------------------------------------------------------
+def dbownchanges(session):
+#----------------------------------------------------------------------
+    '''
+    return the changes this session has made to the runner and alias tables, to go with dbsignature()
+    
+    :param session: database session
+    :rtype: (runner changes, alias changes, runners added)
+    '''
+    runnerchanges,runnersadded = racedb.getownchanges(session,racedb.Runner.__tablename__)
+    aliaschanges,aliasesadded = racedb.getownchanges(session,racedb.Alias.__tablename__)
+    return (runnerchanges,aliaschanges,runnersadded)
+
+#----------------------------------------------------------------------
+def dbonlyownchanges(loadedsignature,loadedownchanges,signature,ownchanges):
+#----------------------------------------------------------------------
+    '''
+    check whether the database changed only by this session's own changes since members were loaded
+    
+    :param loadedsignature: dbsignature() when members were loaded
+    :param loadedownchanges: dbownchanges() when members were loaded
+    :param signature: dbsignature() now
+    :param ownchanges: dbownchanges() now
+    :rtype: True if all the changes since members were loaded were made by this session
+    '''
+    runnerchanges,aliaschanges,runnersadded = [now-then for now,then in zip(ownchanges,loadedownchanges)]
+    loadedrunnercount,loadedrunnertime,loadedaliascount,loadedaliastime,loadedrunners = loadedsignature
+    runnercount,runnertime,aliascount,aliastime,runners = signature
+    
+    # time of last change can only be checked for tables this session didn't change
+    return (runnercount == loadedrunnercount + runnerchanges and (runnerchanges or runnertime == loadedrunnertime)
+            and aliascount == loadedaliascount + aliaschanges and (aliaschanges or aliastime == loadedaliastime)
+            and runners == loadedrunners + runnersadded)
+
+# ClubMember object used by findmembers() worker processes
+workermembers = None
+
+#----------------------------------------------------------------------
+def _initworker(members):
+#----------------------------------------------------------------------
+    '''
+    initialize findmembers() worker process
+    
+    :param members: ClubMember object to search within this process
+    '''
+    global workermembers
+    workermembers = members
+
+#----------------------------------------------------------------------
+def _workerfindmembers(queries,agewindow):
+#----------------------------------------------------------------------
+    '''
+    find members for a share of findmembers() queries within worker process
+    
+    :param queries: list of (name,age,asofdate) tuples
+    :param agewindow: if set, number of years difference from age for members to be considered
+    :rtype: list of (found,missedmatches) in same order as queries
+    '''
+    return workermembers._findmembers(queries,agewindow)
+    
 ########################################################################
 class XlClubMember(ClubMember):
 ########################################################################
@@ -283,11 +1341,22 @@ class XlClubMember(ClubMember):
     
     :params xlfilename: excel file from which club members are to be retrieved
     :params cutoff: cutoff for getmember.  float in (0,1].  higher means strings have to match more closely to be considered "close".  Default 0.6
+    :params useindex: if True, member index file is kept next to xlfilename to speed up subsequent use of the same file
+    :params phoneticcutoff: if set, cutoff for getmember for names which sound the same as the name searched for
     '''
     
     #----------------------------------------------------------------------
-    def __init__(self,xlfilename,cutoff=0.6):
+    def __init__(self,xlfilename,cutoff=0.6,useindex=True,phoneticcutoff=None):
     #----------------------------------------------------------------------
+        indexfile = None
+        signature = None
+        if useindex:
+            # avoid the excel conversion if the index file is current
+            indexfile = getindexfile(xlfilename)
+            signature = filesignature(xlfilename,True)
+            ClubMember.__init__(self,None,cutoff=cutoff,exceldates=True,phoneticcutoff=phoneticcutoff)
+            if self.loadindex(indexfile,signature): return
+            
         c = csvwt.Xls2Csv(xlfilename)   # allow automated header conversion
 
         # retrieve first sheet's csv filename
@@ -296,7 +1365,7 @@ class XlClubMember(ClubMember):
         csvfile = csvfiles[csvsheets[0]]
 
         # do all the work
-        ClubMember.__init__(self,csvfile,cutoff=cutoff,exceldates=True)
+        ClubMember.__init__(self,csvfile,cutoff=cutoff,exceldates=True,indexfile=indexfile,signature=signature,phoneticcutoff=phoneticcutoff)
         
 ########################################################################
 class CsvClubMember(ClubMember):
@@ -306,13 +1375,21 @@ class CsvClubMember(ClubMember):
     
     :params csvfilename: excel file from which club members are to be retrieved
     :params cutoff: cutoff for getmember.  float in (0,1].  higher means strings have to match more closely to be considered "close".  Default 0.6
+    :params useindex: if True, member index file is kept next to csvfilename to speed up subsequent use of the same file
+    :params phoneticcutoff: if set, cutoff for getmember for names which sound the same as the name searched for
     '''
     
     #----------------------------------------------------------------------
-    def __init__(self,csvfilename,cutoff=0.6):
+    def __init__(self,csvfilename,cutoff=0.6,useindex=True,phoneticcutoff=None):
     #----------------------------------------------------------------------
+        indexfile = None
+        signature = None
+        if useindex:
+            indexfile = getindexfile(csvfilename)
+            signature = filesignature(csvfilename,False)
+            
         # do all the work
-        ClubMember.__init__(self,csvfilename,cutoff=cutoff,exceldates=False)
+        ClubMember.__init__(self,csvfilename,cutoff=cutoff,exceldates=False,indexfile=indexfile,signature=signature,phoneticcutoff=phoneticcutoff)
     
 ########################################################################
 class DbClubMember(ClubMember):
@@ -322,60 +1399,176 @@ class DbClubMember(ClubMember):
     
     :params dbfilename: database file from which club members are to be retrieved -- default is to use configured database
     :params cutoff: cutoff for getmember.  float in (0,1].  higher means strings have to match more closely to be considered "close".  Default 0.6
+    :params runners: list of runners to use rather than querying the database, e.g., from getdbclubmembers() -- if set dbfilename and kwfilter are ignored
+    :params aliases: list of aliases to use with runners, rows with alias, name
+    :params useindex: if True and runners not set, member index file is kept in the configuration directory to speed up subsequent use of the database
+    :params phoneticcutoff: if set, cutoff for getmember for names which sound the same as the name searched for
     :params \*\*kwfilter: keyword parameters for racedb.Runner database filter
     '''
     
     #----------------------------------------------------------------------
-    def __init__(self,dbfilename=None,cutoff=0.6,**kwfilter):
+    def __init__(self,dbfilename=None,cutoff=0.6,runners=None,aliases=None,useindex=True,phoneticcutoff=None,**kwfilter):
     #----------------------------------------------------------------------
-        # create database session
-        racedb.setracedb(dbfilename)
-        s = racedb.Session()
+        ClubMember.__init__(self,None,cutoff=cutoff,exceldates=False,phoneticcutoff=phoneticcutoff)
         
-        # TODO: don't really need this since adding exceldates as parameter to ClubMember, but for now keeping for safety
-        def _dob2excel(s,f):
-            try:
-                xl = tYmd.asc2excel(f)
-            except ValueError:
-                xl = None
-            return xl
-        
-        def _city(s,f):
-            if f:
-                return ','.join(f.split(',')[0:-1])
-            else:
-                return None
-        
-        def _state(s,f):
-            if f:
-                return lambda s,f: f.split(',')[-1]
-            else:
-                return None
-        
-        # map database table column names to output column names, and optionally function for transformation
-        # function x is x(s,f), where s is session, f is field value
-        # note it is ok to split name like this, because it will just get joined together when the csv is processed in clubmember
-        d = csvwt.Db2Csv()
-        hdrmap = {'dateofbirth':{'DOB':_dob2excel},
-                  'gender':'Gender',
-                  'name':{'First':lambda s,f: ' '.join(f.split(' ')[0:-1]),'Last':lambda s,f: f.split(' ')[-1]},
-                  'hometown':{'City':_city, 'State':_state}
-                    }
-        d.addtable('Sheet1',s,racedb.Runner,hdrmap,**kwfilter)
-        
-        # done with database
-        s.close()
-
-        # retrieve first sheet's csv filename
-        csvfiles = d.getfiles()
-        csvsheets = list(csvfiles.keys())
-        csvfile = csvfiles[csvsheets[0]]
+        indexfile = None
+        if runners is None:
+            # create database session
+            racedb.setracedb(dbfilename)
+            s = racedb.Session()
+            
+            # there's a separate index file for each filter
+            if useindex:
+                indexfile = getdbindexfile(s,'runners{}'.format(sorted(kwfilter.items())))
+                signature = dbsignature(s)
+                if self.loadindex(indexfile,signature):
+                    s.close()
+                    return
+            
+            runners = s.query(*RUNNERCOLUMNS).filter_by(**kwfilter).all()
+            aliases = s.query(*ALIASCOLUMNS).select_from(racedb.Alias).join(racedb.Runner,racedb.Alias.runnerid==racedb.Runner.id).filter(racedb.Alias.active==True).filter_by(**kwfilter).all()
+            
+            # done with database
+            s.close()
         
-        # do all the work
-        ClubMember.__init__(self,csvfile,cutoff=cutoff,exceldates=True)
+        for runner in runners:
+            self.addrunner(runner)
+        for alias in aliases or []:
+            self.addalias(alias.alias,alias.name)
+        
+        if indexfile:
+            self.saveindex(indexfile,signature)
+    
+    #----------------------------------------------------------------------
+    def addrunner(self,runner):
+    #----------------------------------------------------------------------
+        '''
+        add a runner from the database to the member data structure
+        
+        :param runner: racedb.Runner, or row with name, dateofbirth, gender, hometown
+        '''
+        if not runner.name or runner.name.strip() == '': return
+        self.addmember(runner.name,runner.dateofbirth or '',(runner.gender or '').upper().strip(),runner.hometown or '')
         
-        ## csv files not needed any more
-        #del d
+# racedb.Runner columns needed for DbClubMember
+RUNNERCOLUMNS = [racedb.Runner.name,racedb.Runner.dateofbirth,racedb.Runner.gender,racedb.Runner.hometown]
+
+# racedb.Alias columns needed for DbClubMember, query must select from racedb.Alias and join racedb.Runner
+ALIASCOLUMNS = [racedb.Alias.name.label('alias'),racedb.Runner.name]
+
+#----------------------------------------------------------------------
+def _runnerkind(runner):
+#----------------------------------------------------------------------
+    '''
+    partition runners the same way as filters member=True,active=True; member=True,active=False; member=False
+    
+    :param runner: row with member, active
+    :rtype: 'active', 'inactive', 'nonmember' or None if runner isn't in any of these
+    '''
+    if runner.member is None:
+        return None
+    elif not runner.member:
+        return 'nonmember'
+    elif runner.active:
+        return 'active'
+    elif runner.active is not None:
+        return 'inactive'
+    return None
+
+# kinds of DbClubMember objects returned by getdbclubmembers()
+DBCLUBMEMBERKINDS = ['active','inactive','nonmember']
+
+#----------------------------------------------------------------------
+def getdbclubmembers(session,cutoff=0.6,nonmembercutoff=None,useindex=True,phoneticcutoff=None,nonmemberphoneticcutoff=None):
+#----------------------------------------------------------------------
+    '''
+    returns active members, inactive members and nonmembers from the database
+    
+    all the runners are retrieved with a single query.  If useindex is set, member 
+    index files are kept in the configuration directory, and the query is skipped 
+    if the runner table hasn't changed since they were saved
+    
+    :param session: database session
+    :param cutoff: cutoff for getmember for active and inactive members.  float in (0,1]
+    :param nonmembercutoff: cutoff for getmember for nonmembers, if None cutoff is used
+    :param useindex: if True, use member index files
+    :param phoneticcutoff: if set, cutoff for getmember for active and inactive members, for names which sound the same as the name searched for
+    :param nonmemberphoneticcutoff: if set, cutoff for getmember for nonmembers, for names which sound the same as the name searched for
+    :rtype: (active,inactive,nonmember) DbClubMember objects
+    '''
+    if nonmembercutoff is None:
+        nonmembercutoff = cutoff
+    phoneticcutoffs = {'active':phoneticcutoff,'inactive':phoneticcutoff,'nonmember':nonmemberphoneticcutoff}
+    kinds = DBCLUBMEMBERKINDS
+    cutoffs = {'active':cutoff,'inactive':cutoff,'nonmember':nonmembercutoff}
+    
+    if useindex:
+        signature = dbsignature(session)
+        indexfiles = dict([(kind,getdbindexfile(session,kind)) for kind in kinds])
+        clubmembers = {}
+        for kind in kinds:
+            clubmembers[kind] = DbClubMember(cutoff=cutoffs[kind],runners=[],phoneticcutoff=phoneticcutoffs[kind])
+            if not clubmembers[kind].loadindex(indexfiles[kind],signature): break
+            
+            # remember the database state the members came from, for savedbclubmembers()
+            clubmembers[kind].dbloaded = (signature,dbownchanges(session))
+        else:
+            return tuple([clubmembers[kind] for kind in kinds])
+    
+    # partition the runners and their aliases
+    runners = dict([(kind,[]) for kind in kinds])
+    for runner in session.query(racedb.Runner.member,racedb.Runner.active,*RUNNERCOLUMNS).all():
+        kind = _runnerkind(runner)
+        if kind:
+            runners[kind].append(runner)
+    aliases = dict([(kind,[]) for kind in kinds])
+    for alias in (session.query(racedb.Runner.member,racedb.Runner.active,*ALIASCOLUMNS).select_from(racedb.Alias)
+                  .join(racedb.Runner,racedb.Alias.runnerid==racedb.Runner.id).filter(racedb.Alias.active==True).all()):
+        kind = _runnerkind(alias)
+        if kind:
+            aliases[kind].append(alias)
+    
+    clubmembers = dict([(kind,DbClubMember(cutoff=cutoffs[kind],runners=runners[kind],aliases=aliases[kind],phoneticcutoff=phoneticcutoffs[kind])) 
+                        for kind in kinds])
+    if useindex:
+        for kind in kinds:
+            clubmembers[kind].saveindex(indexfiles[kind],signature)
+            clubmembers[kind].dbloaded = (signature,dbownchanges(session))
+    
+    return tuple([clubmembers[kind] for kind in kinds])
+    
+#----------------------------------------------------------------------
+def savedbclubmembers(session,active,inactive,nonmember):
+#----------------------------------------------------------------------
+    '''
+    save member index files for DbClubMember objects from getdbclubmembers()
+    
+    this should be called after changes to the runner table have been committed, if the 
+    objects have been kept up to date with those changes, e.g., using addrunner().  The next 
+    getdbclubmembers() won't need to retrieve the runners
+    
+    the index files are only saved if the runner and alias tables were changed by nothing but
+    this session since the objects were loaded.  Otherwise the objects may be stale, and the
+    index files are removed so the next getdbclubmembers() retrieves the runners
+    
+    :param session: database session
+    :param active: active members from getdbclubmembers()
+    :param inactive: inactive members from getdbclubmembers()
+    :param nonmember: nonmembers from getdbclubmembers()
+    '''
+    signature = dbsignature(session)
+    ownchanges = dbownchanges(session)
+    for kind,clubmembers in zip(DBCLUBMEMBERKINDS,[active,inactive,nonmember]):
+        indexfile = getdbindexfile(session,kind)
+        dbloaded = getattr(clubmembers,'dbloaded',None)
+        if dbloaded and dbonlyownchanges(dbloaded[0],dbloaded[1],signature,ownchanges):
+            clubmembers.saveindex(indexfile,signature)
+            clubmembers.dbloaded = (signature,ownchanges)
+        else:
+            try:
+                os.remove(indexfile)
+            except OSError:
+                pass
     
 #----------------------------------------------------------------------
 def main(): # TODO: Update this for testing
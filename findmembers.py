@@ -64,31 +64,19 @@ def checkmembership(session,registrationfile,racedate,excluded,active,FOUNDCSV,M
     '''
     
     # collect registrations from registrationfile -- note distance argument doesn't matter
-    rr = raceresults.RaceResults(registrationfile,None,timereqd=False)
-    numentries = 0
-    results = []
-    while True:
-        try:
-            result = next(rr)
-            results.append(result)
-        except StopIteration:
-            break
-        numentries += 1
+    results = raceresults.getresults(registrationfile,None,timereqd=False)
+    numentries = len(results)
+    
+    # looking for members only
+    # look up all the registrations at once, skipping those which have been asked to be excluded
+    included = [result for result in results if result['name'] not in excluded]
+    found = active.findmembers([(result['name'],result['age'],racedate) for result in included])
     
     # loop through registration entries
-    for rndx in range(len(results)):
-        result = results[rndx]
-        
-        # skip result which has been asked to be excluded
-        if result['name'] in excluded: continue
-        
-        # looking for members only
-        # for these, don't indicate found unless member found
-        foundmember = active.findmember(result['name'],result['age'],racedate)
-        
+    # for these, don't indicate found unless member found
+    for result,(foundmember,missed) in zip(included,found):
         # log member names found, but which did not match birth date
         if MISSEDCSV and not foundmember:
-            missed = active.getmissedmatches()
             for thismiss in missed:
                 name = thismiss['dbname']
                 ascdob = thismiss['dob']
@@ -99,7 +87,8 @@ def checkmembership(session,registrationfile,racedate,excluded,active,FOUNDCSV,M
         if foundmember:
             # for members get name, id and gender from database (will replace that which was used in results file)
             name,ascdob = foundmember
-            if CLOSECSV and name.strip().lower() != result['name'].strip().lower():
+            # confirmed aliases have already been reviewed
+            if CLOSECSV and name.strip().lower() != result['name'].strip().lower() and not active.isalias(result['name']):
                 ratio = clubmember.getratio(result['name'].strip().lower(),name.strip().lower())
                 CLOSECSV.writerow({'registration name':result['name'],'registration age':result['age'],'database name':name,'database dob':ascdob,'ratio':ratio})
         
@@ -35,6 +35,7 @@ import csv
 # home grown
 from . import version
 from .render import rendertime
+from .agegradetable import AgeGradeTable
 from loutilities.agegrade import AgeGrade
 
 # distances in miles
@@ -68,8 +69,9 @@ def genagtables(gen,agpcs,ages):
     :param ages: list of ages
     '''
     
-    # instantiate age grade object
+    # instantiate age grade object, and look up factors for each distance once
     ag = AgeGrade()
+    agtables = OrderedDict([(dist,AgeGradeTable(ag,DISTTBL[dist])) for dist in DISTTBL])
     
     # generate csv file for each age grade percentage
     for agpc in agpcs:
@@ -82,15 +84,17 @@ def genagtables(gen,agpcs,ages):
         C = csv.DictWriter(F,hdr)
         C.writeheader()
         
+        # generate results for all ages for each distance
+        results = OrderedDict([(dist,agtables[dist].result(ages,[gen]*len(ages),[agpc]*len(ages)).tolist()) for dist in DISTTBL])
+        
         # generate a row for each age
-        for age in ages:
+        for agendx,age in enumerate(ages):
             row = {}
             row['age'] = age
             
             # generate each result
             for dist in list(DISTTBL.keys()):
-                # if this fails, need to copy result from runningclub.agegrade to loutilities.agegrade
-                thistime = rendertime(ag.result(age,gen,DISTTBL[dist],agpc),0, useceiling=False, usefloor=True)
+                thistime = rendertime(results[dist][agendx],0, useceiling=False, usefloor=True)
                 
                 # make sure format is h:m:s
                 while len(thistime.split(':')) < 3:
@@ -322,90 +322,92 @@ def getresultsmember(memberfile,resultsfile,racedate,dist,outfile):
         while True:
             try:
                 fileresult = next(rr)
-                mngresult   = ManagedResult()
-                for field in fileresult:
-                    if hasattr(mngresult,field):
-                        setattr(mngresult,field,fileresult[field])
-                cleanresult(mngresult)
-                logger.debug('Processing {}'.format(mngresult.name))
-                
-                # create initial disposition
-                candidate = pool.findmember(mngresult.name,mngresult.age,racedate)
-                logger.debug('  candidate = {}'.format(candidate))
-    
-                # for members or people who were once members, set age based on date of birth in database
-                # note this clause will be executed for membersonly races
-                if candidate:
-                    # note some candidates' ascdob may come back as None (these must be nonmembers because we have dob for all current/previous members)
-                    membername,ascdob = candidate
-                    
-                    # set active or inactive member's id
-                    member = members.find(membername,ascdob)
+            except StopIteration:
+                break
+            mngresult   = ManagedResult()
+            for field in fileresult:
+                if hasattr(mngresult,field):
+                    setattr(mngresult,field,fileresult[field])
+            cleanresult(mngresult)
+            mngresults.append(mngresult)
+            numentries += 1
+        
+        # create initial disposition for all the results at once
+        # missed matches outside AGE_DELTAMAX would be removed by filtermissed() anyway
+        candidates = pool.findmembers([(mngresult.name,mngresult.age,racedate) for mngresult in mngresults],agewindow=AGE_DELTAMAX)
+        
+        for mngresult,(candidate,missed) in zip(mngresults,candidates):
+            logger.debug('Processing {}'.format(mngresult.name))
+            logger.debug('  candidate = {}'.format(candidate))
+
+            # for members or people who were once members, set age based on date of birth in database
+            # note this clause will be executed for membersonly races
+            if candidate:
+                # note some candidates' ascdob may come back as None (these must be nonmembers because we have dob for all current/previous members)
+                membername,ascdob = candidate
                 
-                    # if candidate has renewdate and did not join in time for member's only race, indicate this result isn't used
-                    if membersonly and member.renewdate and dbdate.asc2dt(member.renewdate) > dbdate.asc2dt(racedate)+JOIN_GRACEPERIOD:
-                            # discard candidate
-                            candidate = None
-                            
-                    # member joined in time for race, or not member's only race
-                    # if exact match, indicate we have a match
-                    elif membername.lower() == mngresult.name.lower():
-                        # if current or former member
-                        if ascdob:
-                            mngresult.disposition = DISP_MATCH
-                            mngresult.confirmed = True
-                            logger.debug('    DISP_MATCH')
-                            
-                        # otherwise was nonmember, included from some non memberonly race
-                        # should not happen
-                        else:
-                            # ignore candidate
-                            candidate = None
-    
-                    # member joined in time for race, or not member's only race, but match wasn't exact
-                    else:
-                        mngresult.disposition = DISP_CLOSE
-                        mngresult.confirmed = False
-                        logger.debug('    DISP_CLOSE')
-                            
-                # didn't find member on initial search, or candidate was discarded
-                if not candidate:
-                    # favor active members, then inactive members
-                    # note: nonmembers are not looked at for missed because filtermissed() depends on DOB
-                    missed = pool.getmissedmatches()
-                    logger.debug('  pool.getmissedmatches() = {}'.format(missed))
-                    
-                    # don't consider 'missed matches' where age difference from result is too large, or excluded
-                    logger.debug('  missed before filter = {}'.format(missed))
-                    missed = filtermissed(missed,racedate,mngresult.age)
-                    logger.debug('  missed after filter = {}'.format(missed))
-    
-                    # if there remain are any missed results, indicate missed (due to age difference)
-                    # or missed (due to new member proposed for not membersonly)
-                    if len(missed) > 0 or not membersonly:
-                        mngresult.disposition = DISP_MISSED
-                        mngresult.confirmed = False
-                        logger.debug('    DISP_MISSED')
+                # set active or inactive member's id
+                member = members.find(membername,ascdob)
+            
+                # if candidate has renewdate and did not join in time for member's only race, indicate this result isn't used
+                if membersonly and member.renewdate and dbdate.asc2dt(member.renewdate) > dbdate.asc2dt(racedate)+JOIN_GRACEPERIOD:
+                        # discard candidate
+                        candidate = None
                         
-                    # otherwise, this result isn't used
-                    else:
-                        mngresult.disposition = DISP_NOTUSED
+                # member joined in time for race, or not member's only race
+                # if exact match, indicate we have a match
+                elif membername.lower() == mngresult.name.lower():
+                    # if current or former member
+                    if ascdob:
+                        mngresult.disposition = DISP_MATCH
                         mngresult.confirmed = True
-                        logger.debug('    DISP_NOTUSED')
+                        logger.debug('    DISP_MATCH')
                         
-                if mngresult.disposition != DISP_NOTUSED:
-                    # addlvals must match addlfields
-                    if mngresult.disposition != DISP_MISSED:
-                        addlvals = [rendertime(mngresult.time,0),member.name,member.hometown,None]
+                    # otherwise was nonmember, included from some non memberonly race
+                    # should not happen
                     else:
-                        addlvals = [rendertime(mngresult.time,0),None,None,rendermissed(missed,racedate)]
-                    row = copy.copy(mngresult.__dict__)
-                    row.update(dict(list(zip(addlfields,addlvals))))
-                    MR.writerow(row)
+                        # ignore candidate
+                        candidate = None
+
+                # member joined in time for race, or not member's only race, but match wasn't exact
+                else:
+                    mngresult.disposition = DISP_CLOSE
+                    mngresult.confirmed = False
+                    logger.debug('    DISP_CLOSE')
+                        
+            # didn't find member on initial search, or candidate was discarded
+            if not candidate:
+                # favor active members, then inactive members
+                # note: nonmembers are not looked at for missed because filtermissed() depends on DOB
+                logger.debug('  pool missed matches = {}'.format(missed))
                 
-            except StopIteration:
-                break
-            numentries += 1
+                # don't consider 'missed matches' where age difference from result is too large, or excluded
+                logger.debug('  missed before filter = {}'.format(missed))
+                missed = filtermissed(missed,racedate,mngresult.age)
+                logger.debug('  missed after filter = {}'.format(missed))
+
+                # if there remain are any missed results, indicate missed (due to age difference)
+                # or missed (due to new member proposed for not membersonly)
+                if len(missed) > 0 or not membersonly:
+                    mngresult.disposition = DISP_MISSED
+                    mngresult.confirmed = False
+                    logger.debug('    DISP_MISSED')
+                    
+                # otherwise, this result isn't used
+                else:
+                    mngresult.disposition = DISP_NOTUSED
+                    mngresult.confirmed = True
+                    logger.debug('    DISP_NOTUSED')
+                    
+            if mngresult.disposition != DISP_NOTUSED:
+                # addlvals must match addlfields
+                if mngresult.disposition != DISP_MISSED:
+                    addlvals = [rendertime(mngresult.time,0),member.name,member.hometown,None]
+                else:
+                    addlvals = [rendertime(mngresult.time,0),None,None,rendermissed(missed,racedate)]
+                row = copy.copy(mngresult.__dict__)
+                row.update(dict(list(zip(addlfields,addlvals))))
+                MR.writerow(row)
 
 #----------------------------------------------------------------------
 def main(): 
@@ -0,0 +1,135 @@
+#!/usr/bin/python
+###########################################################################################
+# importaliases - import confirmed close matches into alias table within database
+#
+#	Date		Author		Reason
+#	----		------		------
+#       10/18/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+importaliases - import confirmed close matches into alias table within database
+=================================================================================
+
+closefile(s) are "<resultsfile>-close.csv" files as written by importresults, with columns
+
+    * results name - name as found in race results
+    * database name - name of runner in database
+    * database dob - date of birth of runner in database
+
+Results names which have been reviewed and found not to be the runner should be listed in an
+excludefile, same format as the closefile.  This is the same file as used for importresults -e.
+
+Once imported, the results name will be found as the runner by importresults without any
+close match searching.
+'''
+
+# standard
+import pdb
+import argparse
+import csv
+import os.path
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+from . import version
+from . import racedb
+from .racedb import dbConsistencyError
+
+#----------------------------------------------------------------------
+def importaliases(session,closefiles,excludefiles=[]):
+#----------------------------------------------------------------------
+    '''
+    import aliases from close match files
+
+    :param session: database session
+    :param closefiles: list of close match file names
+    :param excludefiles: list of file names with close matches which are not confirmed
+    :rtype: (number of aliases added, list of rows for which the runner was not found, list of rows which matched multiple database rows)
+    '''
+
+    # get list of excluded racers from excludefiles
+    excluded = set()
+    for excludefile in excludefiles:
+        with open(excludefile,'r',newline='') as excl:
+            for row in csv.DictReader(excl):
+                excluded.add(row['results name'])
+
+    added = 0
+    notfound = []
+    duplicates = []
+    for closefile in closefiles:
+        source = os.path.basename(closefile)
+        with open(closefile,'r',newline='') as close:
+            for row in csv.DictReader(close):
+                if row['results name'] in excluded: continue
+
+                try:
+                    runner = racedb.getunique(session,racedb.Runner,name=row['database name'],dateofbirth=row['database dob'])
+                    if not runner:
+                        notfound.append(row)
+                        continue
+
+                    # keep the original provenance if the alias was imported before -- only count new aliases
+                    alias = racedb.Alias(row['results name'],runner.id,source)
+                    isnew = racedb.getunique(session,racedb.Alias,name=alias.name,runnerid=runner.id) is None
+                    racedb.insert_or_update(session,racedb.Alias,alias,skipcolumns=['id','source','added'],name=alias.name,runnerid=runner.id)
+                    if isnew:
+                        added += 1
+
+                # database has more than one runner (or alias) for this row
+                except dbConsistencyError:
+                    duplicates.append(row)
+
+    return added,notfound,duplicates
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    '''
+    import confirmed close matches into alias table
+    '''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--version',action='version',version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('closefile',help='file(s) with confirmed close matches, as written by importresults as "<resultsfile>-close.csv"',nargs='+')
+    parser.add_argument('-e','--excludefile',help='file with close matches which are not the same person, same format as "<resultsfile>-close.csv"',action='append',default=[])
+    parser.add_argument('-r','--racedb',help='filename of race database (default is as configured during rcuserconfig)',default=None)
+    args = parser.parse_args()
+
+    racedb.setracedb(args.racedb)
+    session = racedb.Session()
+
+    added,notfound,duplicates = importaliases(session,args.closefile,args.excludefile)
+    for row in notfound:
+        print('*** runner {} {} not found in database, alias {} not imported'.format(row['database name'],row['database dob'],row['results name']))
+    for row in duplicates:
+        print('*** multiple database rows for runner {} {}, alias {} not imported'.format(row['database name'],row['database dob'],row['results name']))
+    print('{} aliases imported'.format(added))
+
+    session.commit()
+    session.close()
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
@@ -93,6 +93,7 @@ def main():
         return
     
     # get old clubmembers from database
+    # dbmembers is kept up to date as the database is updated, so later names in the file see the changes
     dbmembers = clubmember.DbClubMember()   # use default database
     
     # get all the member runners currently in the database
@@ -163,7 +164,9 @@ def main():
                 # overwrite member's name if necessary
                 thisrunner.name = thisname  
                 
+                oldname,olddob = dbmember.name,dbmember.dateofbirth or ''
                 added = racedb.update(session,racedb.Runner,dbmember,thisrunner,skipcolumns=['id'])
+                dbmembers.updatemember(oldname,olddob,newname=thisname,gender=thisgender,hometown=thishometown)
                 found = True
                 
             # if runner's name is in database, but not a member, see if this runner is a nonmemember which can be converted
@@ -186,7 +189,9 @@ def main():
                 # we found the right person, always if dob isn't specified, but preferably check race result for correct age
                 if dob is None or resultage == expectedage:
                     thisrunner = racedb.Runner(thisname,thisdob,thisgender,thishometown)
+                    oldname,olddob = dbnonmember.name,dbnonmember.dateofbirth or ''
                     added = racedb.update(session,racedb.Runner,dbnonmember,thisrunner,skipcolumns=['id'])
+                    dbmembers.updatemember(oldname,olddob,newname=thisname,newdob=thisdob,gender=thisgender,hometown=thishometown)
                     found = True
                 else:
                     print('{} found in database, wrong age, expected {} found {} in {}'.format(thisname,expectedage,resultage,result))
@@ -197,6 +202,8 @@ def main():
             if not found:
                 thisrunner = racedb.Runner(thisname,thisdob,thisgender,thishometown)
                 added = racedb.insert_or_update(session,racedb.Runner,thisrunner,skipcolumns=['id'],name=thisname,dateofbirth=thisdob)
+                if not dbmembers.updatemember(thisname,thisdob,gender=thisgender,hometown=thishometown):
+                    dbmembers.addrunner(thisrunner)
                 
             # remove this runner from collection of runners which should be deactivated in database
             if (thisrunner.name,thisrunner.dateofbirth) in inactiverunners:
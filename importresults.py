@@ -32,6 +32,7 @@ importresults - add results file to race database
 import pdb
 import argparse
 import collections
+import itertools
 import os.path
 import csv
 
@@ -49,6 +50,7 @@ from . import racedb
 from . import clubmember
 from . import raceresults
 from loutilities import agegrade
+from . import agegradetable
 from . import render
 from loutilities import timeu
 
@@ -59,107 +61,89 @@ AGDEBUG = None
 ag = agegrade.AgeGrade()
 
 #----------------------------------------------------------------------
-def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inactive,nonmember,INACTCSV,MISSEDCSV,CLOSECSV,NONMEMCSV): 
+def readresults(race,resultsfile): 
 #----------------------------------------------------------------------
     '''
-    collect the data, as directed by series attributes
+    collect the results from the results file
     
-    :param session: database session
     :param race: racedb.Race object
     :param resultsfile: file containing results
+    :rtype: list of results as returned from raceresults.RaceResults
+    '''
+    
+    return raceresults.getresults(resultsfile,race.distance)
+
+#----------------------------------------------------------------------
+def resolverunners(runners,race,results,excluded,nonmemforced,active,inactive,nonmember,MISSEDCSV,CLOSECSV): 
+#----------------------------------------------------------------------
+    '''
+    determine which runner each result belongs to
+    
+    this is done once per race, and the resolved runners are used by tabulate() for each series
+    
+    :param runners: racedb.RunnerDirectory object
+    :param race: racedb.Race object
+    :param results: list of results as returned from readresults()
     :param excluded: list of racers which are to be excluded from results, regardless of member match
     :param nonmemforced: list of racers which forced to be included as nonmembers, regardless of member match
-    :param series: racedb.Series object - describes how to calculate results
     :param active: active members as produced by clubmember.ClubMember()
     :param inactive: inactive members as produced by clubmember.ClubMember()
     :param nonmember: nonmembers as produced by clubmember.ClubMember()
-    :param INACTCSV: filehandle to write inactive member log entries, if desired (else None)
     :param MISSEDCSV: filehandle to write log of members which did not match age based on dob in database, if desired (else None)
     :param CLOSECSV: filehandle to write log of members which matched, but not exactly, if desired (else None)
-    :param NONMEMCSV: filehandle to write log of nonmembers which were found, if desired (else None)
-    :rtype: number of entries processed
+    :rtype: [{'result':result,'foundmember':(name,dob)|None,'foundinactive':(name,dob)|None,'foundnonmember':name|None,
+              'name':name,'runnerid':runnerid|None,'gender':gender,'divage':divage,'agegradeage':agegradeage,
+              'agpercent':agpercent|None,'agtime':agtime|None,'agfactor':agfactor|None},...]
+              -- runnerid is None for new nonmembers until addnewrunners() adds them to the database
+              -- age grade statistics are None if agegradeage is not known, see setagegrades()
     '''
     
-    # get precision for time rendering
-    timeprecision,agtimeprecision = render.getprecision(race.distance)
+    # look up all the runners in the results at once
+    # don't look for member if we are forcing this name to be a nonmember
+    included = [result for result in results if result['name'] not in excluded]
+    lookups = [(result['name'],result['age'],race.date) for result in included if result['name'] not in nonmemforced]
+    activefound = dict(list(zip(lookups,active.findmembers(lookups))))
+    inactivefound = dict(list(zip(lookups,inactive.findmembers(lookups))))
+    names = [result['name'] for result in included]
+    nonmemberfound = dict(list(zip(names,nonmember.findnames(names))))
     
-    # get divisions for this series, if appropriate
-    if series.divisions:
-        alldivs = session.query(racedb.Divisions).filter_by(seriesid=series.id,active=True).all()
-        
-        if len(alldivs) == 0:
-            raise dbConsistencyError('series {0} indicates divisions to be calculated, but no divisions found'.format(series.name))
-        
-        divisions = []
-        for div in alldivs:
-            divisions.append((div.divisionlow,div.divisionhigh))
-
-        # TODO: remove dead code
-        #division = {'F':collections.OrderedDict(),'M':collections.OrderedDict()}
-        ## force order of dict.  later delete empty divisions
-        #for gender in ['F','M']:
-        #    for thisdiv in divisions:
-        #        division[gender][thisdiv] = []
-
-    # collect results from resultsfile
-    rr = raceresults.RaceResults(resultsfile,race.distance)
-    numentries = 0
-    results = []
-    while True:
-        try:
-            result = next(rr)
-            results.append(result)
-        except StopIteration:
-            break
-        numentries += 1
+    # division age is based on age as of Jan 1 for race year
+    racedate = tYmd.asc2dt(race.date)
+    divdate = racedate.replace(month=1,day=1)
     
-    # loop through result entries, collecting overall, bygender, division and agegrade results
-    for rndx in range(len(results)):
-        result = results[rndx]
-        
-        # skip result which has been asked to be excluded
-        if result['name'] in excluded: continue
-        
-        # some races are for members only
-        # for these, don't tabulate unless member found
-        # don't look for member if we are forcing this name to be a nonmember
+    resolved = []
+    for result in included:
         foundmember = None
         foundinactive = None
+        missed = []
         if result['name'] not in nonmemforced:
-            foundmember = active.findmember(result['name'],result['age'],race.date)
-            foundinactive = inactive.findmember(result['name'],result['age'],race.date)
-        foundnonmember = nonmember.findname(result['name'])
+            lookup = (result['name'],result['age'],race.date)
+            foundmember,missed = activefound[lookup]
+            foundinactive,inactivemissed = inactivefound[lookup]
+        foundnonmember = nonmemberfound[result['name']]
         
         # log member names found, but which did not match birth date
         if MISSEDCSV and result['name'] not in nonmemforced and not foundmember:
-            missed = active.getmissedmatches()
             for thismiss in missed:
                 name = thismiss['dbname']
                 ascdob = thismiss['dob']
                 ratio = thismiss['ratio']
                 MISSEDCSV.writerow({'results name':result['name'],'results age':result['age'],'database name':name,'database dob':ascdob,'ratio':ratio})
-            
-        # log inactive members (members who had previously paid, but are not paid up) who ran this race
-        if series.membersonly and not foundmember:
-            if foundinactive and INACTCSV:
-                name,ascdob = foundinactive
-                ratio = clubmember.getratio(result['name'].strip().lower(),name.strip().lower())
-                INACTCSV.writerow({'results name':result['name'],'results age':result['age'],'database name':name,'database dob':ascdob,'ratio':ratio})
-            continue
         
         # for members or people who were once members, set age based on date of birth in database
         if foundmember or foundinactive:
             # for members and inactivemembers, get name, id and genderfrom database (will replace that which was used in results file)
             if foundmember:
                 name,ascdob = foundmember
-                if CLOSECSV and name.strip().lower() != result['name'].strip().lower():
+                # confirmed aliases have already been reviewed
+                if CLOSECSV and name.strip().lower() != result['name'].strip().lower() and not active.isalias(result['name']):
                     ratio = clubmember.getratio(result['name'].strip().lower(),name.strip().lower())
                     CLOSECSV.writerow({'results name':result['name'],'results age':result['age'],'database name':name,'database dob':ascdob,'ratio':ratio})
             elif foundinactive:
                 name,ascdob = foundinactive
         
             # get runner from database
-            runner = session.query(racedb.Runner).filter_by(name=name,dateofbirth=ascdob).first()
+            runner = runners.find(name,ascdob)
             runnerid = runner.id
             gender = runner.gender
             
@@ -171,8 +155,6 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
             # set division age (based on age as of Jan 1 for race year)
             # NOTE: the code below assumes that races by divisions are only for members
             # this is because we need to know the runner's age as of Jan 1 for division standings
-            racedate = tYmd.asc2dt(race.date)
-            divdate = racedate.replace(month=1,day=1)
             if dob:
                 divage = divdate.year - dob.year - int((divdate.month, divdate.day) < (dob.month, dob.day))
             else:
@@ -188,16 +170,17 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
                     agegradeage = None
         
         # maybe nonmember was found in the database
+        # if non-member, no division awards, because age as of Jan 1 is not known
         # TODO: there may be misspellings in the results file for non-members -- if this occurs, may need to make this more robust
         elif foundnonmember:
             # TODO: how to handle corner case when there are two matching nonmembers of different ages?
             name = foundnonmember
             
             # get runner from database
-            runner = session.query(racedb.Runner).filter_by(name=name,member=False).first()
+            runner = runners.findnonmember(name)
             runnerid = runner.id
             gender = runner.gender
-            NONMEMCSV.writerow({'results name':result['name'],'results age':result['age'],'new':'N','runner id':runnerid})
+            divage = None
             
             try:
                 agegradeage = int(result['age'])
@@ -205,10 +188,11 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
                 agegradeage = None
 
         # for new non-members, set agegrade age based on results file
-        # if non-member, no division awards, because age as of Jan 1 is not known
+        # runner is added to the database by addnewrunners(), only if some series includes nonmembers
         # TODO: there may be misspellings in the results file for non-members -- if this occurs, may need to make this more robust
         else:
             name = result['name']
+            runnerid = None
             gender = result['gender'].upper()
             divage = None
             
@@ -216,12 +200,181 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
                 agegradeage = int(result['age'])
             except:
                 agegradeage = None
-                
-            # create the nonmember in the database (no date of birth or hometown)
-            runner = racedb.Runner(name,None,gender,None,member=False)
-            added = racedb.insert_or_update(session,racedb.Runner,runner,skipcolumns=['id'],name=runner.name,dateofbirth=None,member=False)
-            runnerid = runner.id
-            NONMEMCSV.writerow({'results name':result['name'],'results age':result['age'],'new':'Y','runner id':runnerid})
+        
+        resolved.append({'result':result,'foundmember':foundmember,'foundinactive':foundinactive,'foundnonmember':foundnonmember,
+                         'name':name,'runnerid':runnerid,'gender':gender,'divage':divage,'agegradeage':agegradeage})
+    
+    setagegrades(race,resolved)
+    return resolved
+
+#----------------------------------------------------------------------
+def setagegrades(race,resolved): 
+#----------------------------------------------------------------------
+    '''
+    set age grade statistics for all the resolved results of a race at once
+
+    age grade is always added if we know the age, whether to render is decided later
+    based on series.calcagegrade, in another script
+
+    :param race: racedb.Race object
+    :param resolved: list of results with resolved runners, as built by resolverunners(), updated in place
+    '''
+    # get precision for time rendering
+    timeprecision,agtimeprecision = render.getprecision(race.distance)
+
+    for thisresolved in resolved:
+        thisresolved['agpercent'] = thisresolved['agtime'] = thisresolved['agfactor'] = None
+    graded = [thisresolved for thisresolved in resolved if thisresolved['agegradeage']]
+    if not graded: return
+
+    adjtimes = [render.adjusttime(thisresolved['result']['time'],timeprecision) for thisresolved in graded]    # ceiling for adjtime
+
+    # debug file gets a line per result
+    if AGDEBUG:
+        for thisresolved,adjtime in zip(graded,adjtimes):
+            AGDEBUG.write('{},{},{},'.format(thisresolved['result']['name'],thisresolved['result']['time'],adjtime))
+            thisresolved['agpercent'],thisresolved['agtime'],thisresolved['agfactor'] = ag.agegrade(thisresolved['agegradeage'],thisresolved['gender'],race.distance,adjtime)
+        return
+
+    agtable = agegradetable.AgeGradeTable(ag,race.distance)
+    agpercents,agtimes,agfactors = agtable.agegrade([thisresolved['agegradeage'] for thisresolved in graded],
+                                                    [thisresolved['gender'] for thisresolved in graded],adjtimes)
+    for thisresolved,agpercent,agtime,agfactor in zip(graded,agpercents.tolist(),agtimes.tolist(),agfactors.tolist()):
+        thisresolved['agpercent'],thisresolved['agtime'],thisresolved['agfactor'] = agpercent,agtime,agfactor
+
+#----------------------------------------------------------------------
+def addnewrunners(session,runners,resolved,nonmember=None): 
+#----------------------------------------------------------------------
+    '''
+    add new nonmembers to the database, all at once
+    
+    a results name which appears more than once becomes a single runner
+    
+    :param session: database session
+    :param runners: racedb.RunnerDirectory object -- new nonmembers are added to this
+    :param resolved: list of results with resolved runners, as returned from resolverunners() -- runnerid is updated for new nonmembers
+    :param nonmember: nonmembers as produced by clubmember.ClubMember() -- if set, new nonmembers are added to this
+    :rtype: number of runners added
+    '''
+    
+    # create the nonmembers (no date of birth or hometown)
+    newresolved = [thisresolved for thisresolved in resolved if thisresolved['runnerid'] is None]
+    newrunners = collections.OrderedDict()
+    for thisresolved in newresolved:
+        name = thisresolved['name']
+        if name not in newrunners:
+            newrunners[name] = racedb.Runner(name,None,thisresolved['gender'],None,member=False)
+    
+    # a nonmember which is already in the database is not added again, but its id is used
+    # only runners which were actually added are new to runners and nonmember
+    inserted = []
+    numadded = racedb.bulk_insert(session,racedb.Runner,list(newrunners.values()),keyfields=['name','dateofbirth','member'],inserted=inserted)
+    for runner in inserted:
+        runners.add(runner)
+        if nonmember:
+            nonmember.addrunner(runner)
+    
+    for thisresolved in newresolved:
+        thisresolved['runnerid'] = newrunners[thisresolved['name']].id
+    
+    return numadded
+
+#----------------------------------------------------------------------
+def setplaces(raceresults,timefield,placefield,precision,averagetie): 
+#----------------------------------------------------------------------
+    '''
+    set places for a group of results, ordered by time
+    
+    ties are detected based on rendering, which rounds to a specific precision based on distance.
+    results without a time are not placed
+    
+    :param raceresults: list of racedb.RaceResult objects within group, e.g., overall, gender, division
+    :param timefield: name of RaceResult field to order results by, e.g., 'time', 'agtime'
+    :param placefield: name of RaceResult field to set place into, e.g., 'overallplace', 'genderplace'
+    :param precision: precision for time rendering
+    :param averagetie: True if tied results get average of tied places, else all tied results get highest place
+    '''
+    
+    # sort once, remembering the rendered time for each result
+    ranked = sorted([raceresult for raceresult in raceresults if getattr(raceresult,timefield) is not None],
+                    key=lambda raceresult: getattr(raceresult,timefield))
+    timekeys = [render.rendertimekey(getattr(raceresult,timefield),precision) for raceresult in ranked]
+    
+    thisplace = 1
+    for timekey,tied in itertools.groupby(list(zip(timekeys,ranked)),key=lambda keyresult: keyresult[0]):
+        tied = [keyresult[1] for keyresult in tied]
+        lasttie = thisplace + len(tied) - 1
+        for raceresult in tied:
+            if len(tied) > 1 and averagetie:
+                setattr(raceresult,placefield,(thisplace+lasttie) / 2.0)
+            else:
+                setattr(raceresult,placefield,thisplace)
+        thisplace = lasttie + 1
+    
+#----------------------------------------------------------------------
+def tabulate(session,race,resolved,series,INACTCSV,NONMEMCSV): 
+#----------------------------------------------------------------------
+    '''
+    collect the data, as directed by series attributes
+    
+    :param session: database session
+    :param race: racedb.Race object
+    :param resolved: list of results with resolved runners, as returned from resolverunners()
+    :param series: racedb.Series object - describes how to calculate results
+    :param INACTCSV: filehandle to write inactive member log entries, if desired (else None)
+    :param NONMEMCSV: filehandle to write log of nonmembers which were found, if desired (else None)
+    :rtype: number of entries tabulated
+    '''
+    
+    # get precision for time rendering
+    timeprecision,agtimeprecision = render.getprecision(race.distance)
+    
+    # get divisions for this series, if appropriate
+    if series.divisions:
+        alldivs = session.query(racedb.Divisions).filter_by(seriesid=series.id,active=True).all()
+        
+        if len(alldivs) == 0:
+            raise dbConsistencyError('series {0} indicates divisions to be calculated, but no divisions found'.format(series.name))
+        
+        divisions = []
+        for div in alldivs:
+            divisions.append((div.divisionlow,div.divisionhigh))
+
+    # loop through resolved result entries, collecting overall, bygender, division and agegrade results
+    numentries = 0
+    raceresults = []
+    for thisresolved in resolved:
+        result = thisresolved['result']
+        foundmember = thisresolved['foundmember']
+        foundinactive = thisresolved['foundinactive']
+        foundnonmember = thisresolved['foundnonmember']
+        name = thisresolved['name']
+        gender = thisresolved['gender']
+        divage = thisresolved['divage']
+        agegradeage = thisresolved['agegradeage']
+        
+        # log inactive members (members who had previously paid, but are not paid up) who ran this race
+        # some races are for members only
+        # for these, don't tabulate unless member found
+        if series.membersonly and not foundmember:
+            if foundinactive and INACTCSV:
+                name,ascdob = foundinactive
+                ratio = clubmember.getratio(result['name'].strip().lower(),name.strip().lower())
+                INACTCSV.writerow({'results name':result['name'],'results age':result['age'],'database name':name,'database dob':ascdob,'ratio':ratio})
+            continue
+        
+        # maybe nonmember was found in the database
+        if not (foundmember or foundinactive) and foundnonmember:
+            if NONMEMCSV:
+                NONMEMCSV.writerow({'results name':result['name'],'results age':result['age'],'new':'N','runner id':thisresolved['runnerid']})
+        
+        # new non-member, was added to the database by addnewrunners()
+        elif not (foundmember or foundinactive):
+            if NONMEMCSV:
+                NONMEMCSV.writerow({'results name':result['name'],'results age':result['age'],'new':'Y','runner id':thisresolved['runnerid']})
+        
+        runnerid = thisresolved['runnerid']
+        numentries += 1
             
         # may need to write to debug file
         if DEBUG: 
@@ -238,14 +391,9 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
         resulttime = result['time']
         raceresult = racedb.RaceResult(runnerid,race.id,series.id,resulttime,gender,agegradeage)
 
-        # always add age grade to result if we know the age
-        # we will decide whether to render, later based on series.calcagegrade, in another script
+        # always add age grade to result if we know the age, see setagegrades()
         if agegradeage:
-            timeprecision,agtimeprecision = render.getprecision(race.distance)
-            adjtime = render.adjusttime(resulttime,timeprecision)    # ceiling for adjtime
-            if AGDEBUG:
-                AGDEBUG.write('{},{},{},'.format(result['name'],resulttime,adjtime))
-            raceresult.agpercent,raceresult.agtime,raceresult.agfactor = ag.agegrade(agegradeage,gender,race.distance,adjtime)
+            raceresult.agpercent,raceresult.agtime,raceresult.agfactor = thisresolved['agpercent'],thisresolved['agtime'],thisresolved['agfactor']
 
         if series.divisions:
             # member's age to determine division is the member's age on Jan 1
@@ -262,137 +410,34 @@ def tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inacti
                         raceresult.divisionhigh = divhigh
                         break
 
-        # make result persistent
-        session.add(raceresult)
+        # places are determined after all results for the series are collected
+        raceresults.append(raceresult)
         
     # process overall and bygender results, sorted by time
     # TODO: is series.overall vs. series.orderby=='time' redundant?  same questio for series.agegrade vs. series.orderby=='agtime'
     if series.orderby == 'time':
-        # get all the results which have been stored in the database for this race/series
         ### TODO: use series.orderby, series.hightolow
-        dbresults = session.query(racedb.RaceResult).filter_by(raceid=race.id,seriesid=series.id).order_by(racedb.RaceResult.time).all()
-        numresults = len(dbresults)
-        for rrndx in range(numresults):
-            raceresult = dbresults[rrndx]
-            
-            # set place if it has not been set before
-            # place may have been determined at previous iteration, if a tie was detected
-            if not raceresult.overallplace:
-                thisplace = rrndx+1
-                tieindeces = [rrndx]
-                
-                # detect tie in subsequent results based on rendering,
-                # which rounds to a specific precision based on distance
-                time = render.rendertime(raceresult.time,timeprecision)
-                for tiendx in range(rrndx+1,numresults):
-                    if render.rendertime(dbresults[tiendx].time,timeprecision) != time:
-                        break
-                    tieindeces.append(tiendx)
-                lasttie = tieindeces[-1] + 1
-                for tiendx in tieindeces:
-                    numsametime = len(tieindeces)
-                    if numsametime > 1 and series.averagetie:
-                        dbresults[tiendx].overallplace = (thisplace+lasttie) / 2.0
-                    else:
-                        dbresults[tiendx].overallplace = thisplace
+        setplaces(raceresults,'time','overallplace',timeprecision,series.averagetie)
 
         for gender in ['F','M']:
-            dbresults = session.query(racedb.RaceResult).filter_by(raceid=race.id,seriesid=series.id,gender=gender).order_by(racedb.RaceResult.time).all()
+            genderresults = [raceresult for raceresult in raceresults if raceresult.gender == gender]
+            setplaces(genderresults,'time','genderplace',timeprecision,series.averagetie)
 
-            numresults = len(dbresults)
-            for rrndx in range(numresults):
-                raceresult = dbresults[rrndx]
-            
-                # set place if it has not been set before
-                # place may have been determined at previous iteration, if a tie was detected
-                if not raceresult.genderplace:
-                    thisplace = rrndx+1
-                    tieindeces = [rrndx]
-                    
-                    # detect tie in subsequent results based on rendering,
-                    # which rounds to a specific precision based on distance
-                    time = render.rendertime(raceresult.time,timeprecision)
-                    for tiendx in range(rrndx+1,numresults):
-                        if render.rendertime(dbresults[tiendx].time,timeprecision) != time:
-                            break
-                        tieindeces.append(tiendx)
-                    lasttie = tieindeces[-1] + 1
-                    for tiendx in tieindeces:
-                        numsametime = len(tieindeces)
-                        if numsametime > 1 and series.averagetie:
-                            dbresults[tiendx].genderplace = (thisplace+lasttie) / 2.0
-                        else:
-                            dbresults[tiendx].genderplace = thisplace
-
-        if series.divisions:
-            for gender in ['F','M']:
-                
-                # linear search for correct division
-                for thisdiv in divisions:
-                    divlow = thisdiv[0]
-                    divhigh = thisdiv[1]
-
-                    dbresults = session.query(racedb.RaceResult)  \
-                                  .filter_by(raceid=race.id,seriesid=series.id,gender=gender,divisionlow=divlow,divisionhigh=divhigh) \
-                                  .order_by(racedb.RaceResult.time).all()
-        
-                    numresults = len(dbresults)
-                    for rrndx in range(numresults):
-                        raceresult = dbresults[rrndx]
-
-                        # set place if it has not been set before
-                        # place may have been determined at previous iteration, if a tie was detected
-                        if not raceresult.divisionplace:
-                            thisplace = rrndx+1
-                            tieindeces = [rrndx]
-                            
-                            # detect tie in subsequent results based on rendering,
-                            # which rounds to a specific precision based on distance
-                            time = render.rendertime(raceresult.time,timeprecision)
-                            for tiendx in range(rrndx+1,numresults):
-                                if render.rendertime(dbresults[tiendx].time,timeprecision) != time:
-                                    break
-                                tieindeces.append(tiendx)
-                            lasttie = tieindeces[-1] + 1
-                            for tiendx in tieindeces:
-                                numsametime = len(tieindeces)
-                                if numsametime > 1 and series.averagetie:
-                                    dbresults[tiendx].divisionplace = (thisplace+lasttie) / 2.0
-                                else:
-                                    dbresults[tiendx].divisionplace = thisplace
+            if series.divisions:
+                for divlow,divhigh in divisions:
+                    divresults = [raceresult for raceresult in genderresults
+                                  if raceresult.divisionlow == divlow and raceresult.divisionhigh == divhigh]
+                    setplaces(divresults,'time','divisionplace',timeprecision,series.averagetie)
 
     # process age grade results, ordered by agtime
     elif series.orderby == 'agtime':
         for gender in ['F','M']:
-            dbresults = session.query(racedb.RaceResult).filter_by(raceid=race.id,seriesid=series.id,gender=gender).order_by(racedb.RaceResult.agtime).all()
-
-            numresults = len(dbresults)
-            for rrndx in range(numresults):
-                raceresult = dbresults[rrndx]
-            
-                # set place if it has not been set before
-                # place may have been determined at previous iteration, if a tie was detected
-                if not raceresult.agtimeplace:
-                    thisplace = rrndx+1
-                    tieindeces = [rrndx]
-                    
-                    # detect tie in subsequent results based on rendering,
-                    # which rounds to a specific precision based on distance
-                    time = render.rendertime(raceresult.agtime,agtimeprecision)
-                    for tiendx in range(rrndx+1,numresults):
-                        if render.rendertime(dbresults[tiendx].agtime,agtimeprecision) != time:
-                            break
-                        tieindeces.append(tiendx)
-                    lasttie = tieindeces[-1] + 1
-                    for tiendx in tieindeces:
-                        numsametime = len(tieindeces)
-                        if numsametime > 1 and series.averagetie:
-                            dbresults[tiendx].agtimeplace = (thisplace+lasttie) / 2.0
-                            #if dbresults[tiendx].agtimeplace == (thisplace+lasttie) / 2:
-                            #    dbresults[tiendx].agtimeplace = int(dbresults[tiendx].agtimeplace)
-                        else:
-                            dbresults[tiendx].agtimeplace = thisplace
+            genderresults = [raceresult for raceresult in raceresults if raceresult.gender == gender]
+            setplaces(genderresults,'agtime','agtimeplace',agtimeprecision,series.averagetie)
 
+    # make results persistent
+    racedb.bulk_insert(session,racedb.RaceResult,raceresults)
+    
     # return number of entries processed
     return numentries
 
@@ -407,6 +452,7 @@ def main():
     parser.add_argument('-F','--force',help='force action without user prompt',action='store_true')
     parser.add_argument('-d','--delete',help='delete results for this race',action='store_true')
     parser.add_argument('-c','--cutoff',help='cutoff for close match lookup (default %(default)0.2f)',type=float,default=0.7)
+    parser.add_argument('-p','--phoneticcutoff',help='if set, lower cutoff for nonmember close match lookup when the names sound the same, e.g., 0.75 (default: not used)',type=float,default=None)
     parser.add_argument('-r','--racedb',help='filename of race database (default is as configured during rcuserconfig)',default=None)
     parser.add_argument('--debug',help='if set, create updateraces.txt for debugging',action='store_true')
     parser.add_argument('--agdebug',help='if set, create importresults-debug-agegrade.csv containing detailed age grade results',action='store_true')
@@ -430,22 +476,20 @@ def main():
         global ag
         ag = agegrade.AgeGrade(DEBUG=AGDEBUG)
     
-    # get active and inactive members, as well as nonmembers
+    # open race database
     if args.racedb:
         racedbfile = args.racedb
     else:
         racedbfile = racedb.getdbfilename()
-    active = clubmember.DbClubMember(racedbfile,cutoff=args.cutoff,member=True,active=True)
-    inactive = clubmember.DbClubMember(racedbfile,cutoff=args.cutoff,member=True,active=False)
-    
-    # insist on high cutoff for nonmember matching
-    NONMEMBERCUTOFF = 0.9
-    nonmember = clubmember.DbClubMember(racedbfile,cutoff=NONMEMBERCUTOFF,member=False)
-    
-    # open race database
     racedb.setracedb(racedbfile)
     session = racedb.Session()
     
+    # get active and inactive members, as well as nonmembers
+    # insist on high cutoff for nonmember matching, unless --phoneticcutoff is set and names sound the same
+    NONMEMBERCUTOFF = 0.9
+    active,inactive,nonmember = clubmember.getdbclubmembers(session,cutoff=args.cutoff,nonmembercutoff=NONMEMBERCUTOFF,
+                                                            nonmemberphoneticcutoff=args.phoneticcutoff)
+    
     # verify race exists
     race = session.query(racedb.Race).filter_by(id=raceid,active=True).first() # should be one of these
     if not race:
@@ -525,29 +569,39 @@ def main():
         NONMEMCSV = csv.DictWriter(NONMEM,['results name','results age','new','runner id'])
         NONMEMCSV.writeheader()
         
+        # parse the results file and determine the runner for each result only once, for all series
+        results = readresults(race,resultsfile)
+        print('{0} entries found in {1}'.format(len(results),resultsfile))
+        runners = racedb.RunnerDirectory(session)
+        resolved = resolverunners(runners,race,results,excluded,nonmemforced,active,inactive,nonmember,MISSEDCSV,CLOSECSV)
+        MISSED.close()
+        CLOSE.close()
+        
+        # nonmembers are only needed if some series isn't for members only
+        if [series for series in theseseries if not series.membersonly]:
+            numadded = addnewrunners(session,runners,resolved,nonmember)
+            print('{0} new nonmembers added'.format(numadded))
+        
         # for each series - 'series' describes how to tabulate the results
         for series in theseseries:
             # tabulate each race for which there are results, if it hasn't been tabulated before
             print('tabulating {0}'.format(series.name))
-            numentries = tabulate(session,race,resultsfile,excluded,nonmemforced,series,active,inactive,nonmember,INACTCSV,MISSEDCSV,CLOSECSV,NONMEMCSV)
+            numentries = tabulate(session,race,resolved,series,INACTCSV,NONMEMCSV)
             print('   {0} entries processed'.format(numentries))
             
             # only collect log entries for the first series
             if INACTCSV:
                 INACT.close()
                 INACTCSV = None
-            if MISSEDCSV:
-                MISSED.close()
-                MISSEDCSV = None
-            if CLOSECSV:
-                CLOSE.close()
-                CLOSECSV = None
             if NONMEMCSV:
                 NONMEM.close()
                 NONMEMCSV = None
     
     # and we're through
     session.commit()
+    
+    # nonmember was kept up to date, so next time the runners don't need to be retrieved
+    clubmember.savedbclubmembers(session,active,inactive,nonmember)
     session.close()
     
     # done with debug files
@@ -0,0 +1,366 @@
+#!/usr/bin/python
+###########################################################################################
+# matchbench - benchmark club member matching with synthetic rosters and results
+#
+#	Date		Author		Reason
+#	----		------		------
+#       10/18/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+matchbench - benchmark club member matching with synthetic rosters and results
+=================================================================================
+
+A roster of members is generated, with names drawn from common given and family names
+weighted by popularity (so many members share names), and a fraction of explicit duplicates
+(same name, different date of birth).  Results are drawn from the roster and from people not
+in the roster, with typos introduced into a controlled fraction of the names.
+
+For each cutoff, ClubMember.findmember, findname and getmember are timed, and precision and
+recall are reported against the known identity of each result.
+
+The roster and results can be written to files, in the formats expected by CsvClubMember and
+RaceResults, for use with the other scripts.
+'''
+
+# standard
+import pdb
+import argparse
+import random
+import csv
+import time
+import datetime
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+from . import version
+from . import clubmember
+
+# common given names, most popular first
+MALENAMES = '''james robert john michael david william richard joseph thomas charles christopher daniel
+    matthew anthony mark donald steven paul andrew joshua kenneth kevin brian george timothy ronald
+    edward jason jeffrey ryan jacob gary nicholas eric jonathan stephen larry justin scott brandon
+    benjamin samuel gregory alexander frank patrick raymond jack dennis jerry tyler aaron jose adam
+    nathan henry douglas zachary peter kyle ethan walter noah jeremy christian keith roger terry
+    gerald harold sean austin carl arthur lawrence dylan jesse jordan bryan billy joe bruce gabriel
+    logan albert willie alan juan wayne elijah randy roy vincent ralph eugene russell bobby mason
+    philip louis'''.split()
+FEMALENAMES = '''mary patricia jennifer linda elizabeth barbara susan jessica sarah karen lisa nancy
+    betty margaret sandra ashley kimberly emily donna michelle carol amanda dorothy melissa deborah
+    stephanie rebecca sharon laura cynthia kathleen amy angela shirley anna brenda pamela emma nicole
+    helen samantha katherine christine debra rachel carolyn janet catherine maria heather diane ruth
+    julie olivia joyce virginia victoria kelly lauren christina joan evelyn judith megan andrea
+    cheryl hannah jacqueline martha gloria teresa ann sara madison frances kathryn janice jean abigail
+    alice judy sophia grace denise amber doris marilyn danielle beverly isabella theresa diana
+    natalie brittany charlotte marie kayla alexis lori'''.split()
+
+# common family names, most popular first
+FAMILYNAMES = '''smith johnson williams brown jones garcia miller davis rodriguez martinez hernandez
+    lopez gonzalez wilson anderson thomas taylor moore jackson martin lee perez thompson white harris
+    sanchez clark ramirez lewis robinson walker young allen king wright scott torres nguyen hill
+    flores green adams nelson baker hall rivera campbell mitchell carter roberts gomez phillips evans
+    turner diaz parker cruz edwards collins reyes stewart morris morales murphy cook rogers gutierrez
+    ortiz morgan cooper peterson bailey reed kelly howard ramos kim cox ward richardson watson brooks
+    chavez wood james bennett gray mendoza ruiz hughes price alvarez castillo sanders patel myers
+    long ross foster jimenez powell jenkins perry russell sullivan bell coleman butler henderson
+    barnes gonzales fisher vasquez simmons romero jordan patterson alexander hamilton graham reynolds
+    griffin wallace moreno west cole hayes bryant herrera gibson ellis tran medina aguilar stevens
+    murray ford castro marshall owens harrison fernandez mcdonald woods washington kennedy wells
+    vargas henry chen freeman webb tucker guzman burns crawford olson simpson porter hunter gordon
+    mendez silva shaw snyder mason dixon munoz hunt hicks holmes palmer wagner black robertson boyd
+    rose stone salazar fox warren mills meyer rice schmidt garza daniels ferguson nichols stephens
+    soto weaver ryan gardner payne grant dunn kelley spencer hawkins arnold pierce vazquez hansen
+    peters santos hart bradley knight elliott cunningham duncan armstrong hudson carroll lane riley
+    andrews alvarado ray delgado berry perkins hoffman johnston matthews pena richards contreras
+    willis carpenter lawrence sandoval'''.split()
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+#----------------------------------------------------------------------
+def zipfweights(n):
+#----------------------------------------------------------------------
+    '''
+    return popularity weights for n names, most popular first
+
+    :param n: number of names
+    :rtype: list of weights
+    '''
+    return [1.0/(rank+1) for rank in range(n)]
+
+#----------------------------------------------------------------------
+def randomname(rand,gender):
+#----------------------------------------------------------------------
+    '''
+    return a random name, with popular names more likely
+
+    :param rand: random.Random object
+    :param gender: 'M' or 'F'
+    :rtype: (given,family)
+    '''
+    givennames = MALENAMES if gender == 'M' else FEMALENAMES
+    given = rand.choices(givennames,zipfweights(len(givennames)))[0]
+    family = rand.choices(FAMILYNAMES,zipfweights(len(FAMILYNAMES)))[0]
+    return given.title(),family.title()
+
+#----------------------------------------------------------------------
+def addtypo(rand,name):
+#----------------------------------------------------------------------
+    '''
+    return name with a single typo -- a character substituted, deleted, inserted or transposed
+
+    :param rand: random.Random object
+    :param name: name to add typo to
+    :rtype: name with typo
+    '''
+    chars = list(name)
+    i = rand.randrange(len(chars))
+    op = rand.randrange(4)
+    if op == 0:
+        chars[i] = rand.choice(LETTERS)
+    elif op == 1 and len(chars) > 1:
+        del chars[i]
+    elif op == 2:
+        chars.insert(i,rand.choice(LETTERS))
+    elif i < len(chars)-1:
+        chars[i],chars[i+1] = chars[i+1],chars[i]
+    return ''.join(chars)
+
+#----------------------------------------------------------------------
+def genroster(rand,nummembers,asofdate,duprate=0.02):
+#----------------------------------------------------------------------
+    '''
+    generate a synthetic roster
+
+    :param rand: random.Random object
+    :param nummembers: number of members in roster
+    :param asofdate: datetime.date members' ages are based on
+    :param duprate: fraction of members which are explicit duplicates (same name, different date of birth)
+    :rtype: [{'given':given,'family':family,'name':name,'dob':yyyy-mm-dd,'gender':'M'|'F','hometown':City, ST},...]
+    '''
+    roster = []
+    seen = set()
+    while len(roster) < nummembers:
+        if roster and rand.random() < duprate:
+            member = dict(rand.choice(roster))
+        else:
+            member = {}
+            member['gender'] = rand.choice('MF')
+            member['given'],member['family'] = randomname(rand,member['gender'])
+            member['name'] = ' '.join([member['given'],member['family']])
+            member['hometown'] = 'Frederick, MD'
+
+        # ages 8 through 85, avoid exact duplicates
+        dob = asofdate - datetime.timedelta(days=rand.randint(8*365,85*365))
+        member['dob'] = dob.strftime('%Y-%m-%d')
+        if (member['name'],member['dob']) in seen: continue
+        seen.add((member['name'],member['dob']))
+        roster.append(member)
+
+    return roster
+
+#----------------------------------------------------------------------
+def genresults(rand,roster,numresults,racedate,typorate=0.1,nonmemberrate=0.3):
+#----------------------------------------------------------------------
+    '''
+    generate synthetic results for a roster
+
+    :param rand: random.Random object
+    :param roster: roster from genroster()
+    :param numresults: number of results
+    :param racedate: datetime.date of race
+    :param typorate: fraction of results names which have a typo
+    :param nonmemberrate: fraction of results which are for people not in the roster
+    :rtype: [{'name':name,'age':age,'gender':'M'|'F','time':seconds,'truth':member or None},...]
+    '''
+    rosternames = set([member['name'].lower() for member in roster])
+    results = []
+    for i in range(numresults):
+        if rand.random() < nonmemberrate:
+            # someone who is not in the roster, but likely has a common name
+            gender = rand.choice('MF')
+            while True:
+                name = ' '.join(randomname(rand,gender))
+                if name.lower() not in rosternames: break
+            truth = None
+            age = rand.randint(8,85)
+        else:
+            truth = rand.choice(roster)
+            name = truth['name']
+            gender = truth['gender']
+            dob = datetime.datetime.strptime(truth['dob'],'%Y-%m-%d').date()
+            age = racedate.year - dob.year - int((racedate.month,racedate.day) < (dob.month,dob.day))
+
+        if rand.random() < typorate:
+            name = addtypo(rand,name)
+
+        results.append({'name':name,'age':age,'gender':gender,'time':rand.randint(15*60,60*60),'truth':truth})
+
+    # place order
+    results.sort(key=lambda result: result['time'])
+    return results
+
+#----------------------------------------------------------------------
+def writeroster(roster,filename):
+#----------------------------------------------------------------------
+    '''
+    write roster in format used by CsvClubMember
+
+    :param roster: roster from genroster()
+    :param filename: name of csv file
+    '''
+    with open(filename,'w',newline='') as ROSTER:
+        ROSTERCSV = csv.DictWriter(ROSTER,['First','Last','DOB','Gender','City','State'])
+        ROSTERCSV.writeheader()
+        for member in roster:
+            city,state = member['hometown'].split(', ')
+            ROSTERCSV.writerow({'First':member['given'],'Last':member['family'],'DOB':member['dob'],
+                                'Gender':member['gender'],'City':city,'State':state})
+
+#----------------------------------------------------------------------
+def writeresults(results,filename):
+#----------------------------------------------------------------------
+    '''
+    write results in format used by RaceResults
+
+    :param results: results from genresults()
+    :param filename: name of csv file
+    '''
+    with open(filename,'w',newline='') as RESULTS:
+        RESULTSCSV = csv.DictWriter(RESULTS,['Place','Name','Gender','Age','Time'])
+        RESULTSCSV.writeheader()
+        for place,result in enumerate(results,1):
+            RESULTSCSV.writerow({'Place':place,'Name':result['name'],'Gender':result['gender'],'Age':result['age'],
+                                 'Time':'{}:{:02d}'.format(result['time']//60,result['time']%60)})
+
+#----------------------------------------------------------------------
+def score(found,truth):
+#----------------------------------------------------------------------
+    '''
+    return precision and recall
+
+    :param found: list of found identities, None if nothing was found
+    :param truth: list of true identities, None if result isn't in roster
+    :rtype: (precision,recall)
+    '''
+    correct = len([1 for f,t in zip(found,truth) if f is not None and f == t])
+    numfound = len([1 for f in found if f is not None])
+    numtrue = len([1 for t in truth if t is not None])
+    precision = correct/numfound if numfound else 1.0
+    recall = correct/numtrue if numtrue else 1.0
+    return precision,recall
+
+#----------------------------------------------------------------------
+def benchmark(roster,results,racedate,cutoffs,agewindow=None,scorer=None):
+#----------------------------------------------------------------------
+    '''
+    time and score member matching for each cutoff
+
+    :param roster: roster from genroster()
+    :param results: results from genresults()
+    :param racedate: yyyy-mm-dd date of race
+    :param cutoffs: list of cutoffs to benchmark
+    :param agewindow: agewindow for findmember, see ClubMember.findmember()
+    :param scorer: scorer for ClubMember, see ClubMember.setscorer(), None for default
+    :rtype: [{'cutoff':cutoff,'method':method,'seconds':seconds,'precision':precision,'recall':recall},...]
+    '''
+    stats = []
+    for cutoff in cutoffs:
+        starttime = time.time()
+        members = clubmember.ClubMember(None,cutoff=cutoff)
+        for member in roster:
+            members.addmember(member['name'],member['dob'],member['gender'],member['hometown'])
+        if scorer:
+            members.setscorer(scorer)
+        stats.append({'cutoff':cutoff,'method':'load','seconds':time.time()-starttime,'precision':None,'recall':None})
+
+        # findmember identifies the member by name and date of birth
+        truth = [(result['truth']['name'],result['truth']['dob']) if result['truth'] else None for result in results]
+        starttime = time.time()
+        found = [members.findmember(result['name'],result['age'],racedate,agewindow=agewindow) for result in results]
+        precision,recall = score(found,truth)
+        stats.append({'cutoff':cutoff,'method':'findmember','seconds':time.time()-starttime,'precision':precision,'recall':recall})
+
+        # findname and getmember only identify the name
+        truth = [result['truth']['name'] if result['truth'] else None for result in results]
+        starttime = time.time()
+        found = [members.findname(result['name']) for result in results]
+        precision,recall = score(found,truth)
+        stats.append({'cutoff':cutoff,'method':'findname','seconds':time.time()-starttime,'precision':precision,'recall':recall})
+
+        starttime = time.time()
+        found = []
+        for result in results:
+            matches = members.getmember(result['name'])
+            found.append(matches['matchingmembers'][0]['name'] if matches else None)
+        precision,recall = score(found,truth)
+        stats.append({'cutoff':cutoff,'method':'getmember','seconds':time.time()-starttime,'precision':precision,'recall':recall})
+
+    return stats
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    '''
+    benchmark club member matching
+    '''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--version',action='version',version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('-m','--members',help='number of members in roster (default %(default)d)',type=int,default=1000)
+    parser.add_argument('-n','--results',help='number of results (default %(default)d)',type=int,default=500)
+    parser.add_argument('-t','--typorate',help='fraction of results names with typos (default %(default)0.2f)',type=float,default=0.1)
+    parser.add_argument('-x','--nonmemberrate',help='fraction of results not in roster (default %(default)0.2f)',type=float,default=0.3)
+    parser.add_argument('-d','--duprate',help='fraction of roster which are duplicate names (default %(default)0.2f)',type=float,default=0.02)
+    parser.add_argument('-c','--cutoffs',help='comma separated list of cutoffs (default %(default)s)',default='0.6,0.7,0.8,0.9')
+    parser.add_argument('-a','--agewindow',help='age window for findmember (default no window)',type=int,default=None)
+    parser.add_argument('-s','--scorer',help='scorer for close matches (default %(default)s)',choices=['sequencematcher','numpy','levenshtein'],default='sequencematcher')
+    parser.add_argument('--seed',help='random seed (default %(default)d)',type=int,default=1)
+    parser.add_argument('--rosterfile',help='if set, write roster to this csv file',default=None)
+    parser.add_argument('--resultsfile',help='if set, write results to this csv file',default=None)
+    args = parser.parse_args()
+
+    rand = random.Random(args.seed)
+    racedate = datetime.date.today()
+    roster = genroster(rand,args.members,racedate,args.duprate)
+    results = genresults(rand,roster,args.results,racedate,args.typorate,args.nonmemberrate)
+    if args.rosterfile:
+        writeroster(roster,args.rosterfile)
+    if args.resultsfile:
+        writeresults(results,args.resultsfile)
+
+    scorers = {'sequencematcher':None,
+               'numpy':clubmember.NumpyScorer(),
+               'levenshtein':clubmember.NumpyScorer(compatible=False)}
+    stats = benchmark(roster,results,racedate.strftime('%Y-%m-%d'),[float(cutoff) for cutoff in args.cutoffs.split(',')],
+                      args.agewindow,scorers[args.scorer])
+
+    print('{} members, {} results, typo rate {:0.2f}, nonmember rate {:0.2f}'.format(args.members,args.results,args.typorate,args.nonmemberrate))
+    print('{:>6s} {:10s} {:>9s} {:>9s} {:>9s}'.format('cutoff','method','seconds','precision','recall'))
+    for stat in stats:
+        precision = '{:9.3f}'.format(stat['precision']) if stat['precision'] is not None else ''
+        recall = '{:9.3f}'.format(stat['recall']) if stat['recall'] is not None else ''
+        print('{:6.2f} {:10s} {:9.3f} {:>9s} {:>9s}'.format(stat['cutoff'],stat['method'],stat['seconds'],precision,recall))
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,8 @@ racedb has the following tables.  See classes of same name (with camelcase) for
     * raceseries
     * series
     * divisions
+    * alias
+    * tablechange
        
 '''
 
@@ -53,6 +55,7 @@ from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()   # create sqlalchemy Base class
 from sqlalchemy import Column, Integer, Float, Boolean, String, Sequence, UniqueConstraint, ForeignKey
 from sqlalchemy.orm import sessionmaker, object_mapper, relationship, backref
+from sqlalchemy import event
 Session = sessionmaker()    # create sqalchemy Session class
 
 # home grown
@@ -67,6 +70,9 @@ t = timeu.asctime(DBDATEFMT)
 # will be handle for persistent storage in webapp
 PERSIST = None
 
+# maximum number of rows to insert with a single statement in bulk_insert()
+BULKBATCHSIZE = 1000
+
 class dbConsistencyError(Exception): pass
 
 #----------------------------------------------------------------------
@@ -240,6 +246,153 @@ def insert_or_update(session, model, newinstance, skipcolumns=[], **kwargs):
         
     return updated
 
+#----------------------------------------------------------------------
+def bulk_insert(session, model, instances, keyfields=None, inserted=None):
+#----------------------------------------------------------------------
+    '''
+    insert many new rows using batched (executemany) insert statements
+    
+    this bypasses the session unit of work, so instances are not added to the session.
+    
+    if keyfields is specified, instances are matched against existing rows first, as
+    insert_or_update() does.  An instance whose key is already in the table (or which
+    repeats the key of an earlier instance) is not inserted, but gets the id of that row.
+    Ids generated by the database are set into the inserted instances.
+    
+    :param session: session within which insert occurs
+    :param model: table model
+    :param instances: list of new instances of table model
+    :param keyfields: list of column names which uniquely identify each instance, or None if ids are not needed
+    :param inserted: if set, list to which the instances which were actually inserted are appended
+    :rtype: number of rows inserted
+    '''
+    
+    if not instances: return 0
+    
+    table = model.__table__
+    columns = [col.key for col in object_mapper(instances[0]).columns if col.key != 'id']
+    dialect = session.get_bind().dialect
+    
+    # ids can be returned from executemany, in parameter order, for some database backends
+    returnids = keyfields and getattr(dialect,'insert_executemany_returning_sort_by_parameter_order',False)
+    
+    numinserted = 0
+    for batchstart in range(0,len(instances),BULKBATCHSIZE):
+        batch = instances[batchstart:batchstart+BULKBATCHSIZE]
+        
+        # look up existing rows based on the first key field, then match on all key fields
+        # the first (lowest id) row wins if the key is duplicated in the table
+        newinstances = batch
+        if keyfields:
+            firstkey = getattr(model,keyfields[0])
+            keycolumns = [getattr(model,keyfield) for keyfield in keyfields]
+            ids = {}
+            for row in session.query(model.id,*keycolumns).filter(firstkey.in_(set([getattr(instance,keyfields[0]) for instance in batch]))).order_by(model.id):
+                ids.setdefault(tuple(row[1:]),row[0])
+            
+            newinstances = []
+            newkeys = {}
+            for instance in batch:
+                key = tuple([getattr(instance,keyfield) for keyfield in keyfields])
+                if key in ids:
+                    instance.id = ids[key]
+                elif key in newkeys:
+                    newkeys[key].append(instance)
+                else:
+                    newkeys[key] = [instance]
+                    newinstances.append(instance)
+        
+        if not newinstances: continue
+        rows = [dict([(col,getattr(instance,col)) for col in columns]) for instance in newinstances]
+        
+        # no ids needed
+        if not keyfields:
+            session.execute(table.insert(),rows)
+            newids = None
+        
+        # ids come back from the batched insert
+        elif returnids:
+            result = session.execute(table.insert().returning(table.c.id,sort_by_parameter_order=True),rows)
+            newids = [row[0] for row in result]
+        
+        # otherwise need to insert one row at a time to get the ids
+        else:
+            newids = [session.execute(table.insert(),row).inserted_primary_key[0] for row in rows]
+        
+        if newids is not None:
+            for instance,newid in zip(newinstances,newids):
+                for keyinstance in newkeys[tuple([getattr(instance,keyfield) for keyfield in keyfields])]:
+                    keyinstance.id = newid
+        
+        numinserted += len(newinstances)
+        if inserted is not None:
+            inserted += newinstances
+    
+    # the session doesn't see these rows, so count the change explicitly
+    if numinserted and issubclass(model,CHANGECOUNTED):
+        countchange(session, table.name, numinserted)
+    
+    return numinserted
+
+#----------------------------------------------------------------------
+def countchange(session, tablename, rowsadded=0):
+#----------------------------------------------------------------------
+    '''
+    increment the change counter for a table
+    
+    the changes made by this session are also kept, see getownchanges()
+    
+    :param session: session within which update occurs
+    :param tablename: name of table which was changed
+    :param rowsadded: number of rows added to the table, less rows deleted
+    '''
+    changes,rows = getownchanges(session, tablename)
+    session.info.setdefault('ownchanges',{})[tablename] = (changes+1,rows+rowsadded)
+    
+    with session.no_autoflush:
+        tablechange = session.query(TableChange).filter_by(tablename=tablename).first()
+    if tablechange is None:
+        tablechange = TableChange(tablename)
+        session.add(tablechange)
+    tablechange.changecount += 1
+    tablechange.lastchange = time.time()
+
+#----------------------------------------------------------------------
+def getownchanges(session, tablename):
+#----------------------------------------------------------------------
+    '''
+    get the changes counted by this session for a table
+    
+    these are counted whether or not they have been committed
+    
+    :param session: session within which changes were made
+    :param tablename: name of table
+    :rtype: (number of times this session incremented the change counter, number of rows added less rows deleted)
+    '''
+    return session.info.get('ownchanges',{}).get(tablename,(0,0))
+
+#----------------------------------------------------------------------
+def getchangecount(session, tablename):
+#----------------------------------------------------------------------
+    '''
+    get the change counter for a table
+    
+    the counter is incremented whenever the session flushes changes to the table, or 
+    bulk_insert() is used for the table, only for tables in CHANGECOUNTED.  Note that 
+    Query.update() and Query.delete() are not counted
+    
+    the time of the last change is returned as well, so a table in a recreated database
+    isn't confused with the original
+    
+    :param session: session within which query occurs
+    :param tablename: name of table
+    :rtype: (number of times the table has been changed, time of last change) 
+    '''
+    tablechange = session.query(TableChange).filter_by(tablename=tablename).first()
+    if tablechange is None:
+        return 0,None
+    return tablechange.changecount,tablechange.lastchange
+
 ########################################################################
 class Runner(Base):
 ########################################################################
@@ -296,6 +449,65 @@ class Runner(Base):
             dispactive = 'inactive'
         return "<Runner('%s','%s','%s','%s','%s','%s')>" % (self.name, self.dateofbirth, self.gender, self.hometown, dispmem, dispactive)
     
+########################################################################
+class RunnerDirectory():
+########################################################################
+    '''
+    directory of runners in the database, loaded with a single query
+    
+    runners are found by (name,dateofbirth) or, for nonmembers, by name.
+    runners added to the database later can be kept in the directory using add()
+    
+    :param session: session within which runners are retrieved
+    '''
+
+    #----------------------------------------------------------------------
+    def __init__(self, session):
+    #----------------------------------------------------------------------
+        self.runners = {}
+        self.nonmembers = {}
+        
+        for runner in session.query(Runner.id,Runner.name,Runner.dateofbirth,Runner.gender,Runner.member).order_by(Runner.id).all():
+            self.add(runner)
+
+    #----------------------------------------------------------------------
+    def add(self, runner):
+    #----------------------------------------------------------------------
+        '''
+        add a runner to the directory
+        
+        :param runner: Runner instance, or other object with id, name, dateofbirth, gender, member attributes
+        '''
+        # if there are multiple runners with the same name and date of birth, the first one is used
+        self.runners.setdefault((runner.name,runner.dateofbirth),runner)
+        
+        # if there are multiple nonmembers with the same name, the first one is used
+        if not runner.member and runner.name not in self.nonmembers:
+            self.nonmembers[runner.name] = runner
+
+    #----------------------------------------------------------------------
+    def find(self, name, dateofbirth):
+    #----------------------------------------------------------------------
+        '''
+        find runner by name and date of birth
+        
+        :param name: runner's name
+        :param dateofbirth: yyyy-mm-dd date of birth
+        :rtype: runner, or None if not found
+        '''
+        return self.runners.get((name,dateofbirth))
+
+    #----------------------------------------------------------------------
+    def findnonmember(self, name):
+    #----------------------------------------------------------------------
+        '''
+        find nonmember by name
+        
+        :param name: runner's name
+        :rtype: runner, or None if not found
+        '''
+        return self.nonmembers.get(name)
+    
 ########################################################################
 class Race(Base):
 ########################################################################
@@ -563,6 +775,96 @@ class Divisions(Base):
     #----------------------------------------------------------------------
         return "<Divisions '%s','%s','%s',active='%s')>" % (self.seriesid, self.divisionlow, self.divisionhigh, self.active)
     
+########################################################################
+class Alias(Base):
+########################################################################
+    '''
+    * alias
+        * runner/id
+    
+    name used in race results which is known to be a particular runner, 
+    e.g., from a confirmed close match
+    
+    :param name: name as found in race results
+    :param runnerid: runner.id
+    :param source: where the alias came from, e.g., close match log file name
+    '''
+    __tablename__ = 'alias'
+    id = Column(Integer, Sequence('alias_id_seq'), primary_key=True)
+    name = Column(String(50))
+    runnerid = Column(Integer, ForeignKey('runner.id'))
+    source = Column(String(100))
+    added = Column(String(10))      # yyyy-mm-dd
+    active = Column(Boolean)
+    __table_args__ = (UniqueConstraint('name', 'runnerid'),)
+    runner = relationship("Runner", backref=backref('aliases', cascade="all, delete, delete-orphan"))
+
+    #----------------------------------------------------------------------
+    def __init__(self, name, runnerid, source=None):
+    #----------------------------------------------------------------------
+        
+        self.name = name
+        self.runnerid = runnerid
+        self.source = source
+        self.added = t.epoch2asc(time.time())
+        self.active = True
+
+    #----------------------------------------------------------------------
+    def __repr__(self):
+    #----------------------------------------------------------------------
+        return "<Alias '%s',runnerid='%s',source='%s',added='%s',active='%s')>" % (self.name, self.runnerid, self.source, self.added, self.active)
+    
+########################################################################
+class TableChange(Base):
+########################################################################
+    '''
+    * tablechange
+    
+    counts changes made to each table, so information derived from a table 
+    (e.g., clubmember index files) can be checked for staleness
+    
+    :param tablename: name of table
+    '''
+    __tablename__ = 'tablechange'
+    id = Column(Integer, Sequence('tablechange_id_seq'), primary_key=True)
+    tablename = Column(String(50), unique=True)
+    changecount = Column(Integer)
+    lastchange = Column(Float)      # time.time() of last change
+
+    #----------------------------------------------------------------------
+    def __init__(self, tablename):
+    #----------------------------------------------------------------------
+        
+        self.tablename = tablename
+        self.changecount = 0
+        self.lastchange = None
+
+    #----------------------------------------------------------------------
+    def __repr__(self):
+    #----------------------------------------------------------------------
+        return "<TableChange '%s',changecount='%s')>" % (self.tablename, self.changecount)
+    
+# tables whose changes are counted, because information derived from them is cached (see clubmember.dbsignature())
+CHANGECOUNTED = (Runner, Alias)
+
+#----------------------------------------------------------------------
+@event.listens_for(Session, 'before_flush')
+def _countchanges(session, flush_context, instances): 
+#----------------------------------------------------------------------
+    '''
+    increment change counters for counted tables (CHANGECOUNTED) which have changes about to be flushed
+    
+    flushes which don't touch these tables don't cost any extra queries.  Note that Query.update()
+    and Query.delete() don't go through the flush, so they bypass this
+    '''
+    new = [obj for obj in session.new if isinstance(obj,CHANGECOUNTED)]
+    deleted = [obj for obj in session.deleted if isinstance(obj,CHANGECOUNTED)]
+    modified = [obj for obj in session.dirty if isinstance(obj,CHANGECOUNTED) and session.is_modified(obj)]
+    tablenames = set([obj.__tablename__ for obj in new + deleted + modified])
+    for tablename in tablenames:
+        rowsadded = len([obj for obj in new if obj.__tablename__ == tablename]) - len([obj for obj in deleted if obj.__tablename__ == tablename])
+        countchange(session, tablename, rowsadded)
+    
 #----------------------------------------------------------------------
 def main(): 
 #----------------------------------------------------------------------
@@ -582,8 +884,9 @@ def main():
         from . import clubmember
         members = clubmember.ClubMember(args.memberfile)
         
-        for name in members.getmembers():
-            thesemembers = members.members[name]
+        allmembers = members.getmembers()
+        for name in allmembers:
+            thesemembers = allmembers[name]
             for thismember in thesemembers:
                 runner = Runner(thismember['name'],thismember['dob'],thismember['gender'],thismember['hometown'])
                 #if runner.name == 'Doug Batey':
@@ -29,13 +29,24 @@ raceresults  -- retrieve race results from a file
 # standard
 import pdb
 import argparse
+import collections
+import multiprocessing
+import os.path
+import hashlib
+import sqlite3
+import mmap
+import re
+import json
+import os
+import datetime
+from operator import itemgetter
 
 # pypi
 
 # github
 
 # home grown
-from .config import parameterError
+from .config import parameterError, CONFIGDIR
 from . import version
 from loutilities import textreader
 
@@ -59,6 +70,176 @@ fieldxform = {
 # exceptions for this module.  See __init__.py for package exceptions
 class headerError(Exception): pass
 
+#----------------------------------------------------------------------
+def compilefieldxform(fieldxform):
+#----------------------------------------------------------------------
+    '''
+    compile fieldxform into a lookup by the first word of each header possibility,
+    so a line can be classified in a single scan by matchheader()
+
+    :param fieldxform: {'field':[possibility, ...], ...}, possibility is string or list of strings
+    :rtype: {firstword:[(field,priority,[word, ...]), ...], ...}
+    '''
+    hdrmatcher = {}
+    for f in fieldxform:
+        for priority,m in enumerate(fieldxform[f]):
+            # m is either a string or a list of strings
+            if isinstance(m, str):
+                m = [m]         # make single string into list
+            hdrmatcher.setdefault(m[0],[]).append((f,priority,m))
+    return hdrmatcher
+
+#----------------------------------------------------------------------
+def matchheader(line,hdrmatcher):
+#----------------------------------------------------------------------
+    '''
+    find the header fields within a line
+
+    for each field the earliest possibility in fieldxform has precedence, and if that
+    possibility is found more than once in the line, the leftmost is used
+
+    :param line: list of lower case words or cells in the line
+    :param hdrmatcher: compiled fieldxform, from compilefieldxform()
+    :rtype: {'field':{'start':linendx,'end':linendx+len(match),'match':match,'genfield':field}, ...}
+    '''
+    field = {}
+    priorities = {}
+    numwords = len(line)
+    for linendx in range(numwords):
+        for f,priority,m in hdrmatcher.get(line[linendx],[]):
+            # already found a better possibility for this field
+            if f in priorities and priorities[f] <= priority: continue
+
+            # match over the end of the line is no match
+            end = linendx + len(m)
+            if end > numwords or line[linendx:end] != m: continue
+
+            priorities[f] = priority
+            field[f] = {'start':linendx, 'end':end, 'match':m, 'genfield':f}    # 'genfield' seems redundant, but [f] index is lost later in self.foundfields
+
+    return field
+
+# compiled once for all RaceResults
+HDRMATCHER = compilefieldxform(fieldxform)
+
+# header format profiles are kept here, see RaceResults useprofiles
+PROFILEFILE = os.path.join(CONFIGDIR,'resultsprofiles.json')
+
+# profiles are only good for the fieldxform they were learned with
+PROFILEVERSION = hashlib.sha1(json.dumps(fieldxform,sort_keys=True).encode('utf8')).hexdigest()[:8]
+
+# plausible range of median pace (minutes per mile) for a race, used to detect hh:mm entered for mm:ss
+# for a single time, e.g., the only result in the file, the same range is used for its pace
+MEDIANPACEMIN = 3.0
+MEDIANPACEMAX = 30.0
+
+#----------------------------------------------------------------------
+def parsetimes(times):
+#----------------------------------------------------------------------
+    '''
+    parse a column of times into seconds
+
+    strings are assumed to be hh:mm:ss or mm:ss or ss, floats or ints are assumed to come
+    from excel, and are in days
+
+    :param times: list of time fields from original file
+    :rtype: numpy float array of times (seconds)
+    '''
+    import numpy as np
+
+    seconds = np.zeros(len(times),dtype=float)
+    isexcel = np.array([type(time) in [float,int] for time in times],dtype=bool)
+
+    # to avoid quantization error through excel, round with epsilon of 0.00005
+    if isexcel.any():
+        exceltimes = np.array([time for time in times if type(time) in [float,int]],dtype=float) * (24*60*60.0)
+        seconds[isexcel] = np.round(exceltimes*10000)/10000.0
+
+    # split off each ':' field from the right, accumulating the fields for times which still have them
+    if not isexcel.all():
+        rest = np.array([time for time in times if type(time) not in [float,int]],dtype=str)
+        tottime = np.zeros(len(rest),dtype=float)
+        multiplier = 1.0
+        active = np.ones(len(rest),dtype=bool)
+        while active.any():
+            split = np.char.rpartition(rest,':')
+            rest = split[:,0]
+            tottime[active] += split[:,2][active].astype(float) * multiplier
+            active &= split[:,1] == ':'
+            multiplier *= 60
+        seconds[~isexcel] = tottime
+
+    return seconds
+
+# characters which keep the mapped file from being sliced by byte offset, as TextReader would not treat
+# them as single characters (tabs are expanded, non-ascii may be multibyte, bare cr ends a line) or strip()
+# would treat them differently
+NOTFIXEDWIDTH = re.compile(rb'[\t\x1c-\x1f\x80-\xff]|\r(?!\n)')
+
+########################################################################
+class FixedWidthReader():
+########################################################################
+    '''
+    read selected columns of a fixed width text file, using memory mapping
+
+    only the columns asked for are decoded, each stripped of white space, which
+    gives the same result as TextReader with delimiters set
+
+    :params filename: name of text file
+    :params skiplines: number of lines to skip, e.g., preamble and header
+    :params columns: list of (start,end) character positions of columns to return, end may be None for rest of line
+    '''
+    #----------------------------------------------------------------------
+    def __init__(self,filename,skiplines,columns):
+    #----------------------------------------------------------------------
+        self.TXT = open(filename,'rb')
+        self.map = mmap.mmap(self.TXT.fileno(),0,access=mmap.ACCESS_READ)
+        self.slices = [slice(start,end) for start,end in columns]
+        for i in range(skiplines):
+            self.map.readline()
+
+    #----------------------------------------------------------------------
+    @staticmethod
+    def canread(filename):
+    #----------------------------------------------------------------------
+        '''
+        check whether a text file can be read by byte offsets
+
+        :param filename: name of text file
+        :rtype: True if file can be read by FixedWidthReader
+        '''
+        try:
+            with open(filename,'rb') as TXT:
+                with mmap.mmap(TXT.fileno(),0,access=mmap.ACCESS_READ) as txtmap:
+                    return NOTFIXEDWIDTH.search(txtmap) is None
+        # e.g., empty file
+        except (OSError,ValueError):
+            return False
+
+    #----------------------------------------------------------------------
+    def __next__(self):
+    #----------------------------------------------------------------------
+        '''
+        read selected columns from next line of file
+
+        :rtype: list of column strings
+        '''
+        line = self.map.readline()
+        if not line:
+            raise StopIteration
+
+        # line is left as bytes, only the selected columns are decoded
+        return [line[col].strip().decode('ascii') for col in self.slices]
+
+    #----------------------------------------------------------------------
+    def close(self):
+    #----------------------------------------------------------------------
+        '''
+        close file
+        '''
+        self.map.close()
+        self.TXT.close()
+
 ########################################################################
 class RaceResults():
 ########################################################################
@@ -68,22 +249,37 @@ class RaceResults():
     :params filename: filename from which race results are to be retrieved
     :params distance: distance for race (miles)
     :params timereqd: default True, set to False if just looking at registration list
+    :params rowtype: 'dict' (default), 'tuple' or 'namedtuple' -- type of each row returned by next(),
+        for 'tuple' the order of the fields is given by self.rowfields
+    :params usemmap: if True, fixed width text files are read through FixedWidthReader once the header is found
+    :params useprofiles: if True, a header which matches a profile in PROFILEFILE at the same line is used without sniffing, see saveprofile()
     '''
     #----------------------------------------------------------------------
-    def __init__(self,filename,distance,timereqd=True):
+    def __init__(self,filename,distance,timereqd=True,rowtype='dict',usemmap=False,useprofiles=False):
     #----------------------------------------------------------------------
+        if rowtype not in ['dict','tuple','namedtuple']:
+            raise parameterError('{0}: invalid rowtype {1}'.format(filename,rowtype))
+
         # open the textreader using the file
         self.file = textreader.TextReader(filename)
         self.filename = filename
         self.distance = distance
         self.timereqd = timereqd
+        self.rowtype = rowtype
+        self.usemmap = usemmap
         
-        # timefactor is based on the first entry's time and distance
-        # see self._normalizetime()
+        # timefactor is based on the median time of all the entries, and distance
+        # see self._settimefactor()
         self.timefactor = None
         
+        # results read ahead of next(), to determine timefactor
+        self.pending = collections.deque()
+        
         # self.field item value will be of form {'begin':startindex,'end':startindex+length} for easy slicing
         self.field = {}
+        self.hdrmatcher = HDRMATCHER
+        self.profiles = readprofiles() if useprofiles else None
+        self.ftype = self.file.ftype
 
         # scan to the header line
         self._findhdr()
@@ -95,20 +291,22 @@ class RaceResults():
         find the header in the file
         '''
     
-        foundhdr = False
-        delimited = self.file.getdelimited()
-        fields = list(fieldxform.keys())
+        delimited = self.hdrdelimited = self.file.getdelimited()
         REQDFIELDS = ['gender','age']    # 'name' fields handled separately
         if self.timereqd:
             REQDFIELDS.append('time')
         MINMATCHES = len(REQDFIELDS) + 1    # add one for 'name'
 
+        # same header as a file which has been seen before, at the same line -- no need to sniff
+        profiled = self.profiles is not None and self._findprofile(delimited,REQDFIELDS)
+
         # catch StopIteration, which means header wasn't found in the file
+        hdrlinenum = 0
         try:
             # loop for each line until header found
-            while True:
+            while not profiled:
                 origline = next(self.file)
-                fieldsfound = 0
+                hdrlinenum += 1
                 line = []
                 if not delimited:
                     for word in origline.split():
@@ -116,41 +314,18 @@ class RaceResults():
                 else:
                     for word in origline:
                         line.append(str(word).lower())  # str() called in case non-string returned in origline
-                    
-                # loop for each potential self.field in a header
-                for fieldndx in range(len(fields)):
-                    f = fields[fieldndx]
-                    match = fieldxform[f]
-                    
-                    # loop for each match possiblity, then within the fields in file header
-                    # folding loop likes this gives precedence to the list order of the match possibilities
-                    for m in match:
-                        # loop for each column in this line, trying to find match possiblities
-                        matchfound = False
-                        for linendx in range(len(line)):                        
-                            # match over the end of the line is no match
-                            # m is either a string or a list of strings
-                            if isinstance(m, str):
-                                m = [m]         # make single string into list
-                            if linendx+len(m)>len(line):
-                                continue
-                            # if we found the match, remember start and end of match
-                            if line[linendx:linendx+len(m)] == m:
-                                if f not in self.field: self.field[f] = {}
-                                self.field[f]['start'] = linendx
-                                self.field[f]['end'] = linendx + len(m)
-                                self.field[f]['match'] = m
-                                self.field[f]['genfield'] = f   # seems redundant, but [f] index is lost later in self.foundfields
-                                fieldsfound += 1
-                                matchfound = True
-                                break   # match possibility loop
-                        
-                        # found match for this self.field
-                        if matchfound: break
-                
+
+                # fields are only remembered if this turns out to be the header line
+                field = matchheader(line,self.hdrmatcher)
+                fieldsfound = len(field)
+
                 # here we've gone through each self.field in the line
                 # need to match more than MINMATCHES to call it a header line
                 if fieldsfound >= MINMATCHES:
+                    self.field = field
+                    self.hdrline = origline
+                    self.hdrlinenum = hdrlinenum
+
                     # special processing for name fields
                     if 'name' not in self.field and ('firstname' in self.field and 'lastname' in self.field):
                         self.splitnames = True
@@ -177,8 +352,7 @@ class RaceResults():
                         raise headerError('{0}: could not find fields {1} in header {2}'.format(self.filename,fieldsnotfound,origline))
                         
                     # sort found fields by order found within the line
-                    foundfields_dec = sorted([(self.field[f]['start'],self.field[f]) for f in self.field])
-                    self.foundfields = [ff[1] for ff in foundfields_dec] # get rid of sorting decorator
+                    self.foundfields = sorted(list(self.field.values()),key=lambda ff: ff['start'])
                         
                     # here we have decided it is a header line
                     # if the file is not delimited, we have to find where these fields start
@@ -224,6 +398,7 @@ class RaceResults():
                         
                         # set up delimiters in the file reader
                         self.file.setdelimiter(delimiters)
+                        self.delimiters = delimiters
                                     
                     break
 
@@ -237,61 +412,204 @@ class RaceResults():
                 currcol = f['start'] - skipped
                 self.fieldcols.append(currcol)
                 skipped += len(f['match']) - 1  # if matched multiple columns, need to skip some
-                
+
+            # precompute column extraction for __next__ (header has at least name, gender, age)
+            # rows shorter than this fall back to picking the columns which are there
+            self.getcols = itemgetter(*self.fieldcols)
+            self.minrowlen = max(self.fieldcols) + 1
+
+            # fields of returned rows, in file order -- split names are returned as 'name' in place of the first of them
+            self.rowfields = []
+            for f in self.fieldhdrs:
+                if f in ['firstname','lastname']:
+                    if 'name' not in self.rowfields:
+                        self.rowfields.append('name')
+                else:
+                    self.rowfields.append(f)
+            self.rowfields = tuple(self.rowfields)
+            self.getrow = itemgetter(*self.rowfields)
+            if self.rowtype == 'namedtuple':
+                self.Row = collections.namedtuple('Row',self.rowfields)
+
+            # for fixed width text file, the rest of the file can be read by byte offsets instead of line by line
+            # FixedWidthReader returns only the columns for fieldcols
+            if self.usemmap and not delimited and self.file.intype == 'file' and self.file.ftype == 'txt' and FixedWidthReader.canread(self.filename):
+                columns = []
+                for col in self.fieldcols:
+                    end = self.delimiters[col+1] if col+1 < len(self.delimiters) else None   # last one goes to end of line
+                    columns.append((self.delimiters[col],end))
+                self.file.close()
+                self.file = FixedWidthReader(self.filename,self.hdrlinenum,columns)
+                self.getcols = tuple
+                self.minrowlen = 0
+
         # not good to come here
         except StopIteration:
             raise headerError('{0}: header not found'.format(self.filename))
         
+    #----------------------------------------------------------------------
+    def _findprofile(self,delimited,reqdfields):
+    #----------------------------------------------------------------------
+        '''
+        look for a header which matches a header format profile, at the line where the profile's header was
+
+        only the lines where profiles' headers were are checked, and lines before them aren't sniffed.
+        If no profile matches, the file is reopened so the header can be sniffed from the beginning
+
+        :param delimited: True if file is delimited
+        :param reqdfields: fields which the header must have
+        :rtype: True if a profile was found and applied
+        '''
+        # {hdrlinenum:set(signature, ...), ...} for profiles which could apply to this file
+        candidates = {}
+        for signature,profile in self.profiles.items():
+            if profile.get('hdrlinenum') and profile['ftype'] == self.ftype and all([f in profile['field'] for f in reqdfields]):
+                candidates.setdefault(profile['hdrlinenum'],set()).add(signature)
+        if not candidates: return False
+
+        linenum = 0
+        lastlinenum = max(candidates)
+        try:
+            while linenum < lastlinenum:
+                origline = next(self.file)
+                linenum += 1
+                if linenum not in candidates: continue
+
+                signature = profilesignature(self.ftype,delimited,origline,linenum)
+                if signature in candidates[linenum]:
+                    profile = self.profiles[signature]
+                    self.field = {f:dict(profile['field'][f]) for f in profile['field']}
+                    self.hdrline = origline
+                    self.hdrlinenum = linenum
+                    self.splitnames = profile['splitnames']
+                    self.foundfields = sorted(list(self.field.values()),key=lambda ff: ff['start'])
+                    if profile['delimiters']:
+                        self.file.setdelimiter(profile['delimiters'])
+                        self.delimiters = profile['delimiters']
+                    return True
+        except StopIteration:
+            pass
+
+        # header is somewhere else, start again
+        self.file.close()
+        self.file = textreader.TextReader(self.filename)
+        return False
+
+    #----------------------------------------------------------------------
+    def getprofile(self):
+    #----------------------------------------------------------------------
+        '''
+        return the format of this file's header, as a header format profile
+
+        the time factor isn't part of the profile, as it depends on the times in the file rather than its format
+
+        :rtype: (signature, profile), see saveprofiles()
+        '''
+        profilesig = profilesignature(self.ftype,self.hdrdelimited,self.hdrline,self.hdrlinenum)
+        profile = {
+            'ftype':self.ftype,
+            'header':self.hdrline if isinstance(self.hdrline,str) else ','.join([str(c) for c in self.hdrline]),
+            'hdrlinenum':self.hdrlinenum,
+            'field':self.field,
+            'splitnames':self.splitnames,
+            'delimiters':getattr(self,'delimiters',None),
+            'lastfile':os.path.basename(self.filename),
+            'lastused':datetime.date.today().strftime('%Y-%m-%d'),
+        }
+        return profilesig,profile
+
+    #----------------------------------------------------------------------
+    def saveprofile(self):
+    #----------------------------------------------------------------------
+        '''
+        save the format of this file's header in PROFILEFILE, so the next file with the same header can skip
+        sniffing the header when read with useprofiles
+
+        :rtype: True if saved
+        '''
+        return saveprofiles([self.getprofile()])
+
+    #----------------------------------------------------------------------
+    def _settimefactor(self,tottimes,distance):
+    #----------------------------------------------------------------------
+        '''
+        determine the time factor for the results, based on distance
+        
+        it is possible that excel times have been put in as hh:mm accidentally
+        the median pace over all the times is used, which is not thrown off by a wrong time for one runner
+        if the median pace doesn't fit MEDIANPACEMIN to MEDIANPACEMAX, divide by 60.  if it still doesn't fit, 
+        ask for help (raise exception)
+        
+        :param tottimes: numpy float array of times (seconds), as found in file
+        :param distance: distance of the race, for normalizedtimetype analysis
+        '''
+        import numpy as np
+        
+        self.timefactor = 1.0
+        if distance and len(tottimes) > 0:
+            medianpace = np.median(tottimes) / (distance * 60.0)
+            if medianpace > MEDIANPACEMAX:
+                self.timefactor = 1/60.0
+            if medianpace*self.timefactor < MEDIANPACEMIN or medianpace*self.timefactor > MEDIANPACEMAX:
+                raise parameterError('{0}: invalid times detected - median pace {1:.1f} min/mile for {2} mile race'.format(self.filename,medianpace,distance))
+    
     #----------------------------------------------------------------------
     def _normalizetime(self,time,distance):
     #----------------------------------------------------------------------
         '''
         normalize the time field, based on distance
         
+        the time factor is normally determined by next() from all the times in the file, 
+        before the first time is normalized
+        
         :param time: time field from original file
         :param distance: distance of the race, for normalizedtimetype analysis
         
         :rtype: float time (seconds)
         '''
-        
-        # if string, assume hh:mm:ss or mm:ss or ss
-        if type(time) in [str,str]:
-            timefields = time.split(':')
-            tottime = 0.0
-            for f in timefields:
-                tottime = tottime*60 + float(f)
-    
-        # if float or int, assume it came from excel, and is in days
-        elif type(time) in [float,int]:
-            tottime = time * (24*60*60.0)
-            
-            # to avoid quantization error through excel, round with epsilon of 0.00005
-            tottime = round(tottime*10000)/10000.0
-        
-        # it is possible that excel times have been put in as hh:mm accidentally
-        # use timefactor to adjust this, based on the time of the first runner, and the distance
-        # assume 6mm +/- 50%.  if the time doesn't fit in this range, divide by 60
-        # if time still doesn't fit, ask for help (raise exception)
+        tottime = float(parsetimes([time])[0])
         if not self.timefactor:
-            timeestimate = distance * 6.0 * 60  # 6 minute mile
-            minpace = timeestimate * 0.5
-            maxpace = timeestimate * 2.0
-            self.timefactor = 1.0
-            if tottime > maxpace:
-                self.timefactor = 1/60.0
-            if tottime*self.timefactor < minpace or tottime*self.timefactor > maxpace:
-                raise parameterError('{0}: invalid time detected - {1} ({2} secs) for {3} mile race'.format(self.filename,time,tottime,distance))
-            
-        tottime *= self.timefactor
-        return tottime
+            self._settimefactor([tottime],distance)
+        return tottime * self.timefactor
     
     #----------------------------------------------------------------------
-    def __next__(self):
+    def _normalizetimes(self,times,distance):
     #----------------------------------------------------------------------
         '''
-        return dict with generic headers and associated data from file
+        normalize a column of time fields, based on distance
+
+        the time factor for the results is determined from the first column normalized, if not already
+        determined by next()
+
+        :param times: list of time fields from original file
+        :param distance: distance of the race, for normalizedtimetype analysis
+
+        :rtype: numpy float array of times (seconds)
         '''
+        tottimes = parsetimes(times)
+        if not self.timefactor and len(tottimes) > 0:
+            self._settimefactor(tottimes,distance)
+        return tottimes * (self.timefactor or 1.0)
+
+    #----------------------------------------------------------------------
+    def _nextresult(self):
+    #----------------------------------------------------------------------
+        '''
+        return dict with generic headers and associated data from file, with time as found in file
         
+        results which were read ahead are returned first
+        '''
+        if self.pending:
+            return self.pending.popleft()
+        return self._readresult()
+    
+    #----------------------------------------------------------------------
+    def _readresult(self):
+    #----------------------------------------------------------------------
+        '''
+        read dict with generic headers and associated data from file, with time as found in file
+        '''
+
         # get next raw line from the file
         # TODO: skip lines which empty text or otherwise invalid lines
         textfound = False
@@ -300,10 +618,13 @@ class RaceResults():
             textfound = True    # hope for the best
             
             # pick columns which are associated with generic headers
-            filteredline = [rawline[i] for i in range(len(rawline)) if i in self.fieldcols]
-            
+            if len(rawline) >= self.minrowlen:
+                filteredline = self.getcols(rawline)
+            else:
+                filteredline = [rawline[i] for i in self.fieldcols if i < len(rawline)]
+
             # create dict association, similar to csv.DictReader
-            result = dict(list(zip(self.fieldhdrs,filteredline)))
+            result = dict(zip(self.fieldhdrs,filteredline))
             
             # special processing for age - normalize to integer
             if 'age' in result and result['age'] is not None:
@@ -339,14 +660,379 @@ class RaceResults():
                 continue
             
             # TODO: add normalization for gender
-            
-            # add normalization for race time (e.g., convert hours to minutes if misuse of excel)
-            if 'time' in result:
-                result['time'] = self._normalizetime(result['time'],self.distance)
+
+        return result
+
+    #----------------------------------------------------------------------
+    def __next__(self):
+    #----------------------------------------------------------------------
+        '''
+        return row with generic headers and associated data from file
+
+        :rtype: dict, or tuple or namedtuple with fields self.rowfields, depending on rowtype
+        '''
+        # the time factor comes from the median time of all the results, so read them ahead the first time
+        if 'time' in self.fieldhdrs and not self.timefactor:
+            while True:
+                try:
+                    self.pending.append(self._readresult())
+                except StopIteration:
+                    break
+            times = [result['time'] for result in self.pending if 'time' in result]
+            self._settimefactor(parsetimes(times),self.distance)
         
+        result = self._nextresult()
+
+        # add normalization for race time (e.g., convert hours to minutes if misuse of excel)
+        if 'time' in result:
+            result['time'] = self._normalizetime(result['time'],self.distance)
+
         # and return result
-        return result
+        if self.rowtype == 'dict':
+            return result
+        try:
+            row = self.getrow(result)
+        except KeyError:    # short row
+            row = tuple([result.get(f) for f in self.rowfields])
+        if self.rowtype == 'namedtuple':
+            return self.Row._make(row)
+        return row
+
+    #----------------------------------------------------------------------
+    def getbatches(self,batchsize=1000):
+    #----------------------------------------------------------------------
+        '''
+        generator which returns the remaining results in batches of columns
+
+        'age' and 'place' columns are numpy masked int arrays, masked where the file had no value,
+        'time' is a numpy float array (seconds), normalized for the whole column at once,
+        and other columns are lists
+
+        :param batchsize: maximum number of results in each batch
+        :rtype: {'field':column, ...} for each field in self.rowfields
+        '''
+        import numpy as np
+
+        while True:
+            results = []
+            try:
+                while len(results) < batchsize:
+                    results.append(self._nextresult())
+            except StopIteration:
+                pass
+
+            if not results: return
+
+            batch = {}
+            for f in self.rowfields:
+                column = [result.get(f) for result in results]
+                if f in ['age','place']:
+                    mask = [v is None for v in column]
+                    batch[f] = np.ma.masked_array([0 if v is None else v for v in column],mask=mask,dtype=int)
+                elif f == 'time':
+                    batch[f] = self._normalizetimes(column,self.distance)
+                else:
+                    batch[f] = column
+            yield batch
+
+            if len(results) < batchsize: return
     
+# bump this when the parsing or normalization of results changes, to invalidate cached results
+RESULTSCACHEVERSION = 3
+
+# cached results are only good for the code version and the fieldxform they were parsed with
+RESULTSCACHEKEY = '{}:{}'.format(RESULTSCACHEVERSION,PROFILEVERSION)
+
+#----------------------------------------------------------------------
+def getresults(filename,distance,timereqd=True,usecache=True,useprofiles=True):
+#----------------------------------------------------------------------
+    '''
+    return all the results from a file
+
+    the parsed results are kept as JSON in a cache file next to the results file, and are
+    retrieved from there when the results file hasn't changed, as long as they were parsed
+    with the same RESULTSCACHEVERSION and fieldxform
+
+    :param filename: filename from which race results are to be retrieved
+    :param distance: distance for race (miles)
+    :param timereqd: default True, set to False if just looking at registration list
+    :param usecache: if True, use and update results cache file
+    :param useprofiles: if True, use and update header format profiles, see RaceResults
+    :rtype: list of results, as returned by next() of RaceResults
+    '''
+    if usecache:
+        signature = filehash(filename)
+        results = readcachedresults(getcachefile(filename),signature,distance,timereqd)
+        if results is not None:
+            return results
+
+    rr = RaceResults(filename,distance,timereqd,useprofiles=useprofiles)
+    results = []
+    while True:
+        try:
+            results.append(next(rr))
+        except StopIteration:
+            break
+    rr.file.close()
+
+    if useprofiles:
+        rr.saveprofile()
+    if usecache:
+        writecachedresults(getcachefile(filename),signature,distance,timereqd,results)
+
+    return results
+
+#----------------------------------------------------------------------
+def filehash(filename):
+#----------------------------------------------------------------------
+    '''
+    return hash of file contents
+
+    :param filename: name of file
+    :rtype: hex digest
+    '''
+    filehash = hashlib.sha1()
+    with open(filename,'rb') as RESULTS:
+        for block in iter(lambda: RESULTS.read(1 << 20), b''):
+            filehash.update(block)
+    return filehash.hexdigest()
+
+#----------------------------------------------------------------------
+def getcachefile(filename):
+#----------------------------------------------------------------------
+    '''
+    return name of results cache file which goes with a results file
+
+    :param filename: results file name
+    :rtype: results cache file name
+    '''
+    return '{}.resultscache'.format(os.path.splitext(filename)[0])
+
+#----------------------------------------------------------------------
+def readcachedresults(cachefile,signature,distance,timereqd):
+#----------------------------------------------------------------------
+    '''
+    read results from results cache file
+
+    :param cachefile: results cache file name
+    :param signature: hash of results file contents
+    :param distance: distance for race (miles)
+    :param timereqd: timereqd used to read results
+    :rtype: list of results, or None if not in cache
+    '''
+    if not os.path.exists(cachefile): return None
+
+    try:
+        cache = sqlite3.connect(cachefile)
+        try:
+            row = cache.execute('SELECT results FROM results WHERE version=? AND signature=? AND distance=? AND timereqd=?',
+                                (RESULTSCACHEKEY,signature,repr(distance),bool(timereqd))).fetchone()
+        finally:
+            cache.close()
+        return json.loads(row[0]) if row else None
+    # corrupt file -- results will be reread
+    except Exception:
+        return None
+
+#----------------------------------------------------------------------
+def writecachedresults(cachefile,signature,distance,timereqd,results):
+#----------------------------------------------------------------------
+    '''
+    write results to results cache file, dropping results cached for earlier contents of the file
+
+    :param cachefile: results cache file name
+    :param signature: hash of results file contents
+    :param distance: distance for race (miles)
+    :param timereqd: timereqd used to read results
+    :param results: list of results
+    :rtype: True if written
+    '''
+    try:
+        cache = sqlite3.connect(cachefile)
+        try:
+            with cache:
+                cache.execute('CREATE TABLE IF NOT EXISTS results (version TEXT, signature TEXT, distance TEXT, timereqd BOOLEAN, results TEXT, '
+                              'PRIMARY KEY (version, signature, distance, timereqd))')
+                cache.execute('DELETE FROM results WHERE version!=? OR signature!=?',(RESULTSCACHEKEY,signature))
+                cache.execute('INSERT OR REPLACE INTO results VALUES (?,?,?,?,?)',
+                              (RESULTSCACHEKEY,signature,repr(distance),bool(timereqd),json.dumps(results)))
+        finally:
+            cache.close()
+        return True
+    # e.g., no write access to directory
+    except (sqlite3.Error,OSError):
+        return False
+
+#----------------------------------------------------------------------
+def profilesignature(ftype,delimited,hdrline,hdrlinenum):
+#----------------------------------------------------------------------
+    '''
+    return signature of a header line, for looking up header format profiles
+
+    for delimited files the signature depends on the lower case header cells, else on the exact
+    header line, as the column positions come from it.  The same header at a different line
+    has a different profile
+
+    :param ftype: file type, e.g., 'csv', 'txt'
+    :param delimited: True if file is delimited
+    :param hdrline: header line as returned by TextReader
+    :param hdrlinenum: line number of header line, starting at 1
+    :rtype: signature
+    '''
+    if delimited:
+        hdr = '\x1f'.join([str(cell).lower() for cell in hdrline])
+    else:
+        hdr = hdrline
+    return hashlib.sha1('{}:{}:{}:{}:{}'.format(PROFILEVERSION,ftype,delimited,hdrlinenum,hdr).encode('utf8')).hexdigest()
+
+#----------------------------------------------------------------------
+def readprofiles(profilefile=PROFILEFILE):
+#----------------------------------------------------------------------
+    '''
+    read header format profiles
+
+    :param profilefile: name of profile file
+    :rtype: {signature:profile, ...}, empty if file is missing or unreadable
+    '''
+    try:
+        with open(profilefile,'r') as PROFILES:
+            return json.load(PROFILES)
+    # missing or corrupt file -- profiles will be relearned
+    except (OSError,ValueError):
+        return {}
+
+#----------------------------------------------------------------------
+def writeprofiles(profiles,profilefile=PROFILEFILE):
+#----------------------------------------------------------------------
+    '''
+    write header format profiles
+
+    the file is replaced in one step so a concurrent reader never sees partial profiles
+
+    :param profiles: {signature:profile, ...}
+    :param profilefile: name of profile file
+    :rtype: True if written
+    '''
+    tempfile = '{}.{}.tmp'.format(profilefile,os.getpid())
+    try:
+        with open(tempfile,'w') as PROFILES:
+            json.dump(profiles,PROFILES,indent=1,sort_keys=True)
+        os.replace(tempfile,profilefile)
+        return True
+    # e.g., no write access to directory
+    except OSError:
+        if os.path.exists(tempfile):
+            os.remove(tempfile)
+        return False
+
+#----------------------------------------------------------------------
+def saveprofiles(newprofiles,profilefile=PROFILEFILE):
+#----------------------------------------------------------------------
+    '''
+    add or update header format profiles, counting their uses
+
+    this reads and rewrites profilefile, so should only be called from one process at a time, e.g.,
+    readresultsfiles() saves the profiles for all the files after its worker processes have finished
+
+    :param newprofiles: list of (signature,profile), as returned by RaceResults.getprofile()
+    :param profilefile: name of profile file
+    :rtype: True if saved
+    '''
+    profiles = readprofiles(profilefile)
+    for signature,newprofile in newprofiles:
+        profile = profiles.get(signature,{'uses':0})
+        profile.pop('timefactor',None)     # no longer kept
+        profile.update(newprofile)
+        profile['uses'] += 1
+        profiles[signature] = profile
+    return writeprofiles(profiles,profilefile)
+
+#----------------------------------------------------------------------
+def readresultsfile(filename,distance,timereqd=True,batchsize=None,useprofiles=True,saveprofile=True):
+#----------------------------------------------------------------------
+    '''
+    read all the results from a file, with diagnostics about the header which was found
+
+    errors in the file are returned in 'error' rather than raised, so one bad file doesn't stop
+    the others from being read by readresultsfiles()
+
+    :param filename: filename from which race results are to be retrieved
+    :param distance: distance for race (miles)
+    :param timereqd: default True, set to False if just looking at registration list
+    :param batchsize: if set, results are returned as list of columnar batches, see RaceResults.getbatches()
+    :param useprofiles: if True, use and update header format profiles, see RaceResults
+    :param saveprofile: if True and useprofiles, the header format profile is saved, else it is returned in 'profile'
+    :rtype: {'filename':filename, 'distance':distance, 'results':list of results or batches, or None,
+             'header':{'line':header line,'fields':generic fields,'columns':columns,'matched':matched header words,
+                       'splitnames':boolean,'timefactor':timefactor} or None,
+             'profile':(signature,profile) or None, 'error':error message or None}
+    '''
+    parsed = {'filename':filename, 'distance':distance, 'results':None, 'header':None, 'profile':None, 'error':None}
+    try:
+        rr = RaceResults(filename,distance,timereqd,useprofiles=useprofiles)
+        parsed['header'] = {
+            'line':rr.hdrline,
+            'fields':rr.fieldhdrs,
+            'columns':rr.fieldcols,
+            'matched':[' '.join(f['match']) for f in rr.foundfields],
+            'splitnames':rr.splitnames,
+            'timefactor':None,
+        }
+
+        if batchsize:
+            results = list(rr.getbatches(batchsize))
+        else:
+            results = []
+            while True:
+                try:
+                    results.append(next(rr))
+                except StopIteration:
+                    break
+        rr.file.close()
+        if useprofiles:
+            if saveprofile:
+                rr.saveprofile()
+            else:
+                parsed['profile'] = rr.getprofile()
+
+        parsed['results'] = results
+        parsed['header']['timefactor'] = rr.timefactor
+
+    except (headerError,parameterError,textreader.parameterError,ValueError,IOError) as e:
+        parsed['error'] = '{0}: {1}'.format(type(e).__name__,e)
+
+    return parsed
+
+#----------------------------------------------------------------------
+def readresultsfiles(files,timereqd=True,batchsize=None,processes=None,useprofiles=True):
+#----------------------------------------------------------------------
+    '''
+    read the results from many files, e.g., when reimporting a season
+
+    :param files: list of (filename,distance) tuples
+    :param timereqd: default True, set to False if just looking at registration lists
+    :param batchsize: if set, results are returned as list of columnar batches, see RaceResults.getbatches()
+    :param processes: if set, number of worker processes to read the files with
+    :param useprofiles: if True, use and update header format profiles, see RaceResults
+    :rtype: list of parsed files in the same order as files, see readresultsfile()
+    '''
+    # profiles are saved here, all at once, rather than by each file's reader
+    args = [(filename,distance,timereqd,batchsize,useprofiles,False) for filename,distance in files]
+
+    if processes and len(files) > 1:
+        # files vary a lot in size, so hand them out one at a time
+        with multiprocessing.Pool(processes) as pool:
+            parsedfiles = pool.starmap(readresultsfile,args,chunksize=1)
+    else:
+        parsedfiles = [readresultsfile(*fileargs) for fileargs in args]
+
+    if useprofiles:
+        profiles = [parsed['profile'] for parsed in parsedfiles if parsed['profile']]
+        if profiles:
+            saveprofiles(profiles)
+
+    return parsedfiles
+
 #----------------------------------------------------------------------
 def main(): # TODO: Update this for testing
 #----------------------------------------------------------------------
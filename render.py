@@ -125,6 +125,30 @@ def adjusttime(rawtime,precision,useceiling=True,usefloor=False):
     
     return adjtime
 
+#----------------------------------------------------------------------
+def rendertimekey(dbtime,precision,useceiling=True,usefloor=False): 
+#----------------------------------------------------------------------
+    '''
+    create integer time which compares the same as the time rendered by rendertime()
+    
+    this is useful to detect ties without creating the rendered string
+    
+    :param dbtime: time in seconds
+    :param precision: number of places after decimal point
+    :param useceiling: True if ceiling function to be used (round up) - takes precedence if both useceiling and usefloor are True
+    :param useceiling: True if floor function is to be used (round down)
+    
+    :rtype: int time in units of 10**-precision seconds
+    '''
+    # same adjustment as adjusttime(), without dividing back down to seconds
+    fixedtime = dbtime * 10**precision
+    if useceiling:
+        return int(math.ceil(fixedtime))
+    elif usefloor:
+        return int(math.floor(fixedtime))
+    else:
+        return int(round(fixedtime))
+
 #----------------------------------------------------------------------
 def rendertime(dbtime,precision,useceiling=True,usefloor=False): 
 #----------------------------------------------------------------------
@@ -186,7 +210,7 @@ def rendertime(dbtime,precision,useceiling=True,usefloor=False):
             rettime = ':' + rettime
         firstthru = False
         rettime = '{0:02d}'.format(thisunit) + rettime
-        remdbtime /= 60
+        remdbtime //= 60
         thisunit = remdbtime%60
         
     while rettime[0] == '0':
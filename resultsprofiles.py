@@ -0,0 +1,118 @@
+#!/usr/bin/python
+###########################################################################################
+# resultsprofiles - list and prune header format profiles for results files
+#
+#	Date		Author		Reason
+#	----		------		------
+#       10/18/26        Lou King        Create
+#
+#   Copyright 2026 Lou King
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+###########################################################################################
+'''
+resultsprofiles - list and prune header format profiles for results files
+============================================================================
+
+Header format profiles are learned by raceresults as results files are read, so the next
+file with the same header doesn't need to be sniffed.  Profiles which are no longer used,
+e.g., after a timing company changes their layout, can be pruned.
+'''
+
+# standard
+import pdb
+import argparse
+import datetime
+
+# pypi
+
+# github
+
+# other
+
+# home grown
+from . import version
+from . import raceresults
+
+#----------------------------------------------------------------------
+def listprofiles(profiles):
+#----------------------------------------------------------------------
+    '''
+    list header format profiles, most used first
+
+    :param profiles: {signature:profile, ...} as returned by raceresults.readprofiles()
+    '''
+    SIGLEN = 10
+    HDRLEN = 60
+    cols = '{0:' + str(SIGLEN) + 's} {1:>5s} {2:10s} {3:4s} {4:>4s} {5:25s} {6:' + str(HDRLEN) + 's}'
+    print(cols.format('profile','uses','lastused','type','line','lastfile','header'))
+    for signature,profile in sorted(list(profiles.items()),key=lambda item: -item[1]['uses']):
+        hdrlinenum = str(profile.get('hdrlinenum') or '')
+        header = ' '.join(profile['header'].split())
+        print(cols.format(signature[0:SIGLEN],str(profile['uses']),profile['lastused'],profile['ftype'],hdrlinenum,
+                          profile['lastfile'][0:25],header[0:HDRLEN]))
+
+#----------------------------------------------------------------------
+def pruneprofiles(profiles,signatures=[],unuseddays=None):
+#----------------------------------------------------------------------
+    '''
+    prune header format profiles
+
+    :param profiles: {signature:profile, ...} as returned by raceresults.readprofiles(), updated in place
+    :param signatures: list of signatures (or leading part of signatures) of profiles to delete
+    :param unuseddays: if set, profiles not used for this many days are deleted
+    :rtype: list of signatures deleted
+    '''
+    if unuseddays is not None:
+        oldest = (datetime.date.today() - datetime.timedelta(unuseddays)).strftime('%Y-%m-%d')
+    else:
+        oldest = None
+
+    deleted = []
+    for signature in list(profiles.keys()):
+        if any([signature.startswith(s) for s in signatures]) or (oldest and profiles[signature]['lastused'] < oldest):
+            profiles.pop(signature)
+            deleted.append(signature)
+
+    return deleted
+
+#----------------------------------------------------------------------
+def main():
+#----------------------------------------------------------------------
+    '''
+    list and prune header format profiles
+    '''
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--version',action='version',version='{0} {1}'.format('runningclub',version.__version__))
+    parser.add_argument('-d','--delete',help='delete profile, as shown by list (may be repeated)',action='append',default=[])
+    parser.add_argument('-u','--unuseddays',help='delete profiles not used for this many days',type=int,default=None)
+    parser.add_argument('-f','--profilefile',help='profile file (default %(default)s)',default=raceresults.PROFILEFILE)
+    args = parser.parse_args()
+
+    profiles = raceresults.readprofiles(args.profilefile)
+
+    if args.delete or args.unuseddays is not None:
+        deleted = pruneprofiles(profiles,args.delete,args.unuseddays)
+        if not raceresults.writeprofiles(profiles,args.profilefile):
+            print('*** could not write {}'.format(args.profilefile))
+            return
+        print('{} profiles deleted'.format(len(deleted)))
+
+    listprofiles(profiles)
+
+# ##########################################################################################
+#	__main__
+# ##########################################################################################
+if __name__ == "__main__":
+    main()
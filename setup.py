@@ -50,16 +50,19 @@ setup(
         'runningclub/exportresults.py',
         'runningclub/genagtables.py',
         'runningclub/getresultsmembers.py',
+        'runningclub/importaliases.py',
         'runningclub/importmembers.py',
         'runningclub/importraces.py',
         'runningclub/importresults.py',
         'runningclub/listraces.py',
+        'runningclub/matchbench.py',
         'runningclub/racingteamresults.py',
         'runningclub/rcadminapprove.py',
         'runningclub/rcadminconfig.py',
         'runningclub/rcuserconfig.py',
         'runningclub/renderrace.py',
         'runningclub/renderstandings.py',
+        'runningclub/resultsprofiles.py',
         'runningclub/summarizemembers.py',
         'runningclub/summarizemembers_rsu.py',  # in use steeplechasers/crontab as of 2020-02-28
         'runningclub/mailchimpimport_rsu.py',   # in use steeplechasers/crontab as of 2020-02-28
@@ -71,6 +74,7 @@ setup(
     install_requires = [
         #'loutilities>=0.5.0',
         'xlrd>=0.8.0',
+        'numpy',
         ],
 
     # If any package contains any of these file types, include them:
@@ -93,16 +97,19 @@ setup(
             'exportresults = runningclub.exportresults:main',
             'genagtables = runningclub.genagtables:main',
             'getresultsmembers = runningclub.getresultsmembers:main',
+            'importaliases = runningclub.importaliases:main',
             'importmembers = runningclub.importmembers:main',
             'importraces = runningclub.importraces:main',
             'importresults = runningclub.importresults:main',
             'listraces = runningclub.listraces:main',
+            'matchbench = runningclub.matchbench:main',
             'racingteamresults = runningclub.racingteamresults:main',
             'rcadminapprove = runningclub.rcadminapprove:main',
             'rcadminconfig = runningclub.rcadminconfig:main',
             'rcuserconfig = runningclub.rcuserconfig:main',
             'renderrace = runningclub.renderrace:main',
             'renderstandings = runningclub.renderstandings:main',
+            'resultsprofiles = runningclub.resultsprofiles:main',
             'summarizemembers = runningclub.summarizemembers:main',
             'summarizemembers_rsu = runningclub.summarizemembers_rsu:main',
             'mailchimpimport_rsu = runningclub.mailchimpimport_rsu:main',
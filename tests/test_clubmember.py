@@ -0,0 +1,190 @@
+'''
+test_clubmember - tests for clubmember
+'''
+
+# standard
+import random
+import difflib
+
+# pypi
+
+# home grown
+from .. import clubmember
+
+GIVEN = '''james robert john michael david william mary patricia jennifer linda elizabeth barbara
+    anna angela amanda sandra dan don jon joan jean'''.split()
+FAMILY = '''smith johnson williams brown jones garcia miller davis turner tucker mcdonald
+    macdonald lee li king kingston'''.split()
+LETTERS = 'abcdefghijklmnopqrstuvwxyz '
+
+#----------------------------------------------------------------------
+def typo(rand,name):
+#----------------------------------------------------------------------
+    '''
+    return name with a character substituted, deleted, inserted or transposed
+    '''
+    chars = list(name)
+    i = rand.randrange(len(chars))
+    op = rand.randrange(4)
+    if op == 0:
+        chars[i] = rand.choice(LETTERS)
+    elif op == 1 and len(chars) > 1:
+        del chars[i]
+    elif op == 2:
+        chars.insert(i,rand.choice(LETTERS))
+    elif i < len(chars)-1:
+        chars[i],chars[i+1] = chars[i+1],chars[i]
+    return ''.join(chars)
+
+#----------------------------------------------------------------------
+def roster(rand,nummembers,cutoff):
+#----------------------------------------------------------------------
+    '''
+    return ClubMember with random members
+    '''
+    members = clubmember.ClubMember(None,cutoff=cutoff)
+    for i in range(nummembers):
+        name = ' '.join([rand.choice(GIVEN),rand.choice(FAMILY)]).title()
+        dob = '{}-{:02d}-{:02d}'.format(rand.randint(1940,2010),rand.randint(1,12),rand.randint(1,28))
+        members.addmember(name,dob,rand.choice('MF'),'Frederick, MD')
+    return members
+
+#----------------------------------------------------------------------
+def test_closematches_typos():
+#----------------------------------------------------------------------
+    '''
+    close matches are the same as difflib.get_close_matches for names with typos
+    '''
+    rand = random.Random(1)
+    for cutoff in [0.5,0.6,0.7,0.8,0.85,0.9]:
+        members = roster(rand,300,cutoff)
+        keys = list(members.members.keys())
+        for i in range(200):
+            name = rand.choice(keys)
+            for t in range(rand.randint(1,4)):
+                name = typo(rand,name)
+            expected = difflib.get_close_matches(name.lower(),keys,n=3,cutoff=cutoff)
+            assert [key for score,key in members._scoredmatches(name,n=3)] == expected, (cutoff,name)
+
+#----------------------------------------------------------------------
+def test_closematches_noshared_ngrams():
+#----------------------------------------------------------------------
+    '''
+    names which share no n-grams can still be close matches
+    '''
+    members = clubmember.ClubMember(None,cutoff=0.5)
+    for name in ['caa ba','zzz']:
+        members.addmember(name,'','M','')
+    assert [key for score,key in members._scoredmatches('aab')] == difflib.get_close_matches('aab',['caa ba','zzz'],cutoff=0.5)
+
+#----------------------------------------------------------------------
+def test_closematches_short_alphabet():
+#----------------------------------------------------------------------
+    '''
+    close matches are the same as difflib.get_close_matches for strings with many repeated n-grams
+    '''
+    rand = random.Random(2)
+    for cutoff in [0.5,0.7,0.85,0.9,0.95]:
+        members = clubmember.ClubMember(None,cutoff=cutoff)
+        while len(members.members) < 100:
+            name = ''.join([rand.choice('ab c') for i in range(rand.randint(2,14))]).strip()
+            if name: members.addmember(name,'','M','')
+        keys = list(members.members.keys())
+        for i in range(100):
+            name = ''.join([rand.choice('ab c') for i in range(rand.randint(2,14))]).strip() or 'a'
+            expected = difflib.get_close_matches(name,keys,n=3,cutoff=cutoff)
+            assert [key for score,key in members._scoredmatches(name,n=3)] == expected, (cutoff,name)
+
+#----------------------------------------------------------------------
+def aliasroster():
+#----------------------------------------------------------------------
+    '''
+    return ClubMember where a member's name is also an alias for another member
+    '''
+    members = clubmember.ClubMember(None,cutoff=0.7)
+    members.addmember('Robert Smith','1970-03-01','M','')
+    members.addmember('Bob Smith','1995-03-01','M','')
+    members.addalias('Bob Smith','Robert Smith')
+    members.addalias('Rob Smyth','Robert Smith')
+    return members
+
+#----------------------------------------------------------------------
+def test_alias_exactname_first():
+#----------------------------------------------------------------------
+    '''
+    member with exactly the name searched for comes before the alias targets
+    '''
+    members = aliasroster()
+    assert members.findname('Bob Smith') == 'Bob Smith'
+    assert members.getmember('Bob Smith')['matchingmembers'][0]['name'] == 'Bob Smith'
+    assert members.getmember('Bob Smith')['exactmatch']
+
+#----------------------------------------------------------------------
+def test_alias_findmember_age():
+#----------------------------------------------------------------------
+    '''
+    findmember picks the exact name or the alias target by age
+    '''
+    members = aliasroster()
+    for agewindow in [None,2]:
+        assert members.findmember('Bob Smith',29,'2024-06-01',agewindow) == ('Bob Smith','1995-03-01')
+        assert members.findmember('Bob Smith',54,'2024-06-01',agewindow) == ('Robert Smith','1970-03-01')
+    assert members.findmember('Rob Smyth',54,'2024-06-01',2) == ('Robert Smith','1970-03-01')
+
+#----------------------------------------------------------------------
+def test_alias_outside_agewindow():
+#----------------------------------------------------------------------
+    '''
+    close matches are searched for if no alias target is within the age window
+    '''
+    members = aliasroster()
+    assert members.findmember('Rob Smyth',29,'2024-06-01',2) == ('Bob Smith','1995-03-01')
+
+#----------------------------------------------------------------------
+def test_incremental_indexes():
+#----------------------------------------------------------------------
+    '''
+    indexes after addmember, removemember and updatemember are the same as when built from scratch
+    '''
+    rand = random.Random(4)
+    members = clubmember.ClubMember(None,cutoff=0.7,phoneticcutoff=0.6)
+    current = []
+    for i in range(2000):
+        op = rand.random()
+        if current and op < 0.3:
+            name,dob,gender,hometown = current.pop(rand.randrange(len(current)))
+            assert members.removemember(name,dob)
+        elif current and op < 0.45:
+            j = rand.randrange(len(current))
+            name,dob,gender,hometown = current[j]
+            newname = ' '.join([rand.choice(GIVEN),rand.choice(FAMILY)]).title() if rand.random() < 0.5 else None
+            newdob = '' if rand.random() < 0.3 else None
+            updated = (newname if newname is not None else name,newdob if newdob is not None else dob,gender,hometown)
+            # members are identified by name and dob
+            if updated[:2] in [member[:2] for member in current]: continue
+            assert members.updatemember(name,dob,newname=newname,newdob=newdob)
+            current[j] = updated
+        else:
+            name = ' '.join([rand.choice(GIVEN),rand.choice(FAMILY)]).title()
+            dob = '' if rand.random() < 0.2 else '{}-{:02d}-01'.format(rand.randint(1940,2010),rand.randint(1,12))
+            if (name,dob) in [member[:2] for member in current]: continue
+            current.append((name,dob,rand.choice('MF'),'Frederick, MD'))
+            members.addmember(*current[-1])
+    assert not members.removemember('Nobody Here','')
+
+    scratch = clubmember.ClubMember(None,cutoff=0.7,phoneticcutoff=0.6)
+    for member in current:
+        scratch.addmember(*member)
+
+    assert sorted(members.members) == sorted(scratch.members)
+    for attr in ['ngramindex','charindex','phoneticindex','birthyears']:
+        assert getattr(members,attr) == getattr(scratch,attr), attr
+    assert members.nobirthyear == scratch.nobirthyear
+    bydob = lambda memberdicts: sorted(memberdicts,key=lambda member: (member['dob'],member['gender']))
+    scratchdicts = scratch.getmembers()
+    for name,memberdicts in members.getmembers().items():
+        assert bydob(memberdicts) == bydob(scratchdicts[name]), name
+
+    for i in range(100):
+        name = typo(rand,rand.choice(current)[0])
+        assert members._scoredmatches(name,n=3) == scratch._scoredmatches(name,n=3), name
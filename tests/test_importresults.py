@@ -0,0 +1,47 @@
+'''
+test_importresults - tests for importresults
+'''
+
+# standard
+from types import SimpleNamespace
+
+# pypi
+import pytest
+from loutilities import agegrade
+
+# home grown
+try:
+    from .. import importresults
+except agegrade.missingConfiguration:
+    pytest.skip('age grade configuration not available', allow_module_level=True)
+
+#----------------------------------------------------------------------
+def placed(times,precision,averagetie):
+#----------------------------------------------------------------------
+    '''
+    return places set by setplaces() for results with the given times, in the given order
+    '''
+    results = [SimpleNamespace(time=time,overallplace=None) for time in times]
+    importresults.setplaces(results,'time','overallplace',precision,averagetie)
+    return [result.overallplace for result in results]
+
+#----------------------------------------------------------------------
+def test_setplaces_ties():
+#----------------------------------------------------------------------
+    '''
+    results which render the same are tied
+    '''
+    times = [1300.0,1200.2,1100.0,1200.7]
+    assert placed(times,0,True) == [4,2.5,1,2.5]
+    assert placed(times,0,False) == [4,2,1,2]
+    assert placed(times,1,True) == [4,2,1,3]
+
+#----------------------------------------------------------------------
+def test_setplaces_notime():
+#----------------------------------------------------------------------
+    '''
+    results without a time are not placed, and don't affect other places
+    '''
+    assert placed([None,1200.0,1100.0,None,1200.0],0,True) == [None,2.5,1,None,2.5]
+    assert placed([None,None],0,False) == [None,None]
+    assert placed([],0,False) == []
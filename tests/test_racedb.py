@@ -0,0 +1,90 @@
+'''
+test_racedb - tests for racedb
+'''
+
+# pypi
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+
+# home grown
+from .. import racedb
+
+#----------------------------------------------------------------------
+@pytest.fixture(params=[True,False], ids=['returning','rowbyrow'])
+def session(request):
+#----------------------------------------------------------------------
+    '''
+    in-memory database session, with ids returned from executemany or row by row
+    '''
+    engine = create_engine('sqlite://')
+    engine.dialect.insert_executemany_returning_sort_by_parameter_order = request.param
+    racedb.Base.metadata.create_all(engine)
+    session = racedb.Session(bind=engine)
+    yield session
+    session.close()
+
+#----------------------------------------------------------------------
+def test_bulk_insert_keys(session):
+#----------------------------------------------------------------------
+    '''
+    existing and repeated keys are not inserted, and all instances get the right id
+    '''
+    existing = racedb.Runner('Mary Ng','1980-01-01','F','Frederick')
+    other = racedb.Runner('Bob Lee',None,'M','Frederick',member=False)
+    session.add_all([existing,other])
+    session.flush()
+
+    runners = [racedb.Runner('Mary Ng','1980-01-01','F','Frederick'),      # existing member
+               racedb.Runner('Sue King','1975-05-05','F','Walkersville'),   # new
+               racedb.Runner('Bob Lee','1990-02-02','M','Frederick'),       # same name, new
+               racedb.Runner('Sue King','1975-05-05','F','Walkersville'),   # repeats new
+               racedb.Runner('Al Smith',None,'M','Thurmont',member=False),  # new
+               ]
+
+    inserted = []
+    numadded = racedb.bulk_insert(session,racedb.Runner,runners,keyfields=['name','dateofbirth','member'],inserted=inserted)
+
+    assert numadded == 3
+    assert inserted == [runners[1],runners[2],runners[4]]
+    assert runners[0].id == existing.id
+    assert runners[3].id == runners[1].id
+    ids = [runners[i].id for i in [1,2,4]] + [existing.id,other.id]
+    assert None not in ids
+    assert len(set(ids)) == 5
+
+    rows = dict([(r.id,(r.name,r.dateofbirth,r.member)) for r in session.query(racedb.Runner)])
+    assert len(rows) == 5
+    for runner in runners:
+        assert rows[runner.id] == (runner.name,runner.dateofbirth,runner.member)
+
+#----------------------------------------------------------------------
+def test_bulk_insert_member_key(session):
+#----------------------------------------------------------------------
+    '''
+    a member only matches an existing row which is also a member
+    '''
+    nonmember = racedb.Runner('Jo Jones',None,'F','Frederick',member=False)
+    session.add(nonmember)
+    session.flush()
+
+    member = racedb.Runner('Jo Jones',None,'F','Frederick')
+    samenonmember = racedb.Runner('Jo Jones',None,'F','Frederick',member=False)
+    inserted = []
+    racedb.bulk_insert(session,racedb.Runner,[samenonmember],keyfields=['name','dateofbirth','member'],inserted=inserted)
+    assert inserted == []
+    assert samenonmember.id == nonmember.id
+
+    # the member doesn't pick up the nonmember's id, so an insert is attempted
+    with pytest.raises(IntegrityError):
+        racedb.bulk_insert(session,racedb.Runner,[member],keyfields=['name','dateofbirth','member'])
+
+#----------------------------------------------------------------------
+def test_bulk_insert_nokeys(session):
+#----------------------------------------------------------------------
+    '''
+    without keyfields everything is inserted
+    '''
+    runners = [racedb.Runner('Runner {}'.format(i),None,'M','Frederick') for i in range(5)]
+    assert racedb.bulk_insert(session,racedb.Runner,runners) == 5
+    assert session.query(racedb.Runner).count() == 5
@@ -0,0 +1,146 @@
+'''
+test_raceresults - tests for raceresults
+'''
+
+# standard
+import random
+
+# pypi
+import pytest
+
+# home grown
+from .. import raceresults
+from ..config import parameterError
+
+FIRST = ['John','Mary','Bob','Sue','Al','Jo']
+LAST = ['Smith','Jones','Lee','King','Ng']
+
+#----------------------------------------------------------------------
+def writecsv(path,times):
+#----------------------------------------------------------------------
+    '''
+    write csv results file with a preamble, and return its name
+    '''
+    rand = random.Random(1)
+    with open(str(path),'w') as CSV:
+        CSV.write('Frederick 5K results\n\nPlace,Name,Sex,Age,Time\n')
+        for place,time in enumerate(times,1):
+            CSV.write('{},{} {},{},{},{}\n'.format(place,rand.choice(FIRST),rand.choice(LAST),rand.choice('MF'),rand.randint(10,80),time))
+    return str(path)
+
+#----------------------------------------------------------------------
+def writetxt(path,numresults):
+#----------------------------------------------------------------------
+    '''
+    write fixed width text results file with a preamble, and return its name
+    '''
+    rand = random.Random(2)
+    with open(str(path),'w') as TXT:
+        TXT.write('   Timing by Acme  -- Overall place results by time\n\n')
+        TXT.write('Place Last Name   First Name  Sex Age Time     Hometown\n')
+        TXT.write('===== =========== =========== === === ======== ==========\n')
+        for place in range(1,numresults+1):
+            seconds = 900 + 7*place
+            TXT.write('{:5d} {:11s} {:11s} {:3s} {:3d} {:>8s} {}\n'.format(place,rand.choice(LAST),rand.choice(FIRST),rand.choice('MF'),
+                                                                         rand.randint(10,80),'{}:{:02d}'.format(seconds//60,seconds%60),'Frederick'))
+    return str(path)
+
+#----------------------------------------------------------------------
+def allrows(rr):
+#----------------------------------------------------------------------
+    '''
+    return all the rows from a RaceResults object
+    '''
+    rows = []
+    while True:
+        try:
+            rows.append(next(rr))
+        except StopIteration:
+            break
+    rr.file.close()
+    return rows
+
+#----------------------------------------------------------------------
+def test_parsetimes():
+#----------------------------------------------------------------------
+    '''
+    strings are hh:mm:ss, mm:ss or ss, numbers are excel days
+    '''
+    times = raceresults.parsetimes(['1:02:03','20:05','45','0:59.5',12.5/(24*60),1])
+    assert times.tolist() == [3723.0,1205.0,45.0,59.5,750.0,86400.0]
+
+#----------------------------------------------------------------------
+def test_normalizetimes_median(tmpdir):
+#----------------------------------------------------------------------
+    '''
+    time factor comes from the median time, not the first finisher, by row and by batch
+    '''
+    times = ['0:45','20:00','21:30','25:00']
+    filename = writecsv(tmpdir.join('first.csv'),times)
+    rows = allrows(raceresults.RaceResults(filename,3.1))
+    assert [row['time'] for row in rows] == [45.0,1200.0,1290.0,1500.0]
+
+    batches = list(raceresults.RaceResults(filename,3.1).getbatches(2))
+    assert [time for batch in batches for time in batch['time'].tolist()] == [45.0,1200.0,1290.0,1500.0]
+
+#----------------------------------------------------------------------
+def test_normalizetimes_hhmm(tmpdir):
+#----------------------------------------------------------------------
+    '''
+    hh:mm entered for mm:ss is detected, by row and by batch
+    '''
+    filename = writecsv(tmpdir.join('hhmm.csv'),['20:00:00','21:30:00','25:00:00'])
+    rr = raceresults.RaceResults(filename,3.1)
+    assert [row['time'] for row in allrows(rr)] == [1200.0,1290.0,1500.0]
+    assert rr.timefactor == 1/60.0
+
+    rr = raceresults.RaceResults(filename,3.1)
+    assert [time for batch in rr.getbatches() for time in batch['time'].tolist()] == [1200.0,1290.0,1500.0]
+
+#----------------------------------------------------------------------
+def test_normalizetimes_invalid(tmpdir):
+#----------------------------------------------------------------------
+    '''
+    times which don't make sense for the distance raise parameterError
+    '''
+    filename = writecsv(tmpdir.join('fast.csv'),['0:30','0:40','0:50'])
+    with pytest.raises(parameterError):
+        allrows(raceresults.RaceResults(filename,3.1))
+    with pytest.raises(parameterError):
+        list(raceresults.RaceResults(filename,3.1).getbatches())
+
+#----------------------------------------------------------------------
+def test_fixedwidthreader(tmpdir):
+#----------------------------------------------------------------------
+    '''
+    FixedWidthReader gives the same results as TextReader
+    '''
+    filename = writetxt(tmpdir.join('results.txt'),50)
+    assert raceresults.FixedWidthReader.canread(filename)
+
+    plain = raceresults.RaceResults(filename,3.1)
+    mapped = raceresults.RaceResults(filename,3.1,usemmap=True)
+    assert isinstance(mapped.file,raceresults.FixedWidthReader)
+    assert not isinstance(plain.file,raceresults.FixedWidthReader)
+
+    rows = allrows(plain)
+    assert len(rows) == 50
+    assert allrows(mapped) == rows
+
+#----------------------------------------------------------------------
+def test_fixedwidthreader_tabs(tmpdir):
+#----------------------------------------------------------------------
+    '''
+    files with tabs are not read by byte offsets, but results are the same
+    '''
+    filename = writetxt(tmpdir.join('results.txt'),10)
+    tabname = str(tmpdir.join('tabs.txt'))
+    with open(filename) as TXT:
+        lines = TXT.readlines()
+    with open(tabname,'w') as TXT:
+        TXT.writelines(lines[:-1] + [lines[-1].replace('Frederick','\tFrederick')])
+    assert not raceresults.FixedWidthReader.canread(tabname)
+
+    mapped = raceresults.RaceResults(tabname,3.1,usemmap=True)
+    assert not isinstance(mapped.file,raceresults.FixedWidthReader)
+    assert allrows(mapped)[:-1] == allrows(raceresults.RaceResults(filename,3.1))[:-1]